@@ -4,7 +4,7 @@ from datetime import timedelta
 from app.database import get_db
 from app.models import Staff, Customer, UserRole
 from app.schemas import Token, LoginRequest
-from app.utils.auth import verify_password, create_access_token, create_refresh_token, get_password_hash
+from app.utils.auth import verify_and_update_password, create_access_token, create_refresh_token, get_password_hash
 from app.config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
@@ -21,12 +21,21 @@ def staff_login(login_data: LoginRequest, db: Session = Depends(get_db)):
         (Staff.phone == login_data.username)
     ).first()
     
-    if not staff or not verify_password(login_data.password, staff.password_hash):
+    verified, new_hash = (
+        verify_and_update_password(login_data.password, staff.password_hash)
+        if staff else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
     
+    # Upgrade legacy password hashes
+    if new_hash:
+        staff.password_hash = new_hash
+        db.commit()
+    
     if not staff.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -51,12 +60,21 @@ def customer_login(login_data: LoginRequest, db: Session = Depends(get_db)):
     # Find customer by phone
     customer = db.query(Customer).filter(Customer.phone == login_data.username).first()
     
-    if not customer or not verify_password(login_data.password, customer.password_hash):
+    verified, new_hash = (
+        verify_and_update_password(login_data.password, customer.password_hash)
+        if customer else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect phone number or password"
         )
     
+    # Upgrade legacy password hashes
+    if new_hash:
+        customer.password_hash = new_hash
+        db.commit()
+    
     if not customer.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
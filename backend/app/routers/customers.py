@@ -62,6 +62,7 @@ def register_customer(
         password=password,
         shop_website=settings.SHOP_WEBSITE
     )
+    sms_service.flush_logs()
     
     return customer
 
@@ -279,8 +279,9 @@ def download_invoice_pdf(
         invoice_data, work_order_data, shop_data, customer_data, line_items_data
     )
     
-    # Update invoice with PDF URL
-    if not invoice.pdf_url:
+    # Update invoice with PDF URL (the filename changes with the content);
+    # superseded files are removed later by the scheduler's PDF sweep
+    if invoice.pdf_url != pdf_path:
         invoice.pdf_url = pdf_path
         db.commit()
     
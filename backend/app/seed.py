@@ -2,10 +2,13 @@
 Seed database with realistic demo data
 Run with: python -m app.seed
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import random
 from faker import Faker
-from app.database import SessionLocal, init_db
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from app.database import engine, init_db
 from app.models import (
     Shop, Staff, Customer, Car, WorkOrder, WorkOrderLineItem, 
     Invoice, Appointment, UserRole, WorkOrderStatus, InvoiceStatus, AppointmentStatus
@@ -17,10 +20,26 @@ faker = Faker(['bg_BG'])
 Faker.seed(42)
 random.seed(42)
 
+# Number of concurrent password-hashing workers
+SEED_WORKERS = 4
+
+# Seed objects are reused across commits, so keep their loaded state instead
+# of expiring it and re-selecting every row on next access
+SeedSession = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+def hash_passwords(passwords):
+    """Hash passwords concurrently (the hasher's C backend releases the GIL while hashing)"""
+    with ThreadPoolExecutor(max_workers=SEED_WORKERS) as pool:
+        return list(pool.map(get_password_hash, passwords))
+
+
 def create_seed_data():
     """Create seed data for demo/testing"""
     
-    db = SessionLocal()
+    db = SeedSession()
+    # Single reference time for every generated timestamp
+    now = datetime.utcnow()
     
     try:
         print("Initializing database...")
@@ -49,8 +68,18 @@ def create_seed_data():
         db.refresh(shop)
         print(f"✓ Shop created: {shop.name} (ID: {shop.id})")
         
-        # Create Super Admin
         print("\nCreating staff...")
+        mechanic_names = [
+            ("Петър", "Василев", "Двигатели"),
+            ("Стоян", "Георгиев", "Ходова част"),
+            ("Красимир", "Тодоров", "Електрика"),
+            ("Николай", "Христов", "Климатици"),
+        ]
+        admin_hash, manager_hash, reception_hash, *mechanic_hashes = hash_passwords(
+            ["admin123", "manager123", "reception123"] + ["mechanic123"] * len(mechanic_names)
+        )
+        
+        # Create Super Admin
         super_admin = Staff(
             shop_id=shop.id,
             username="admin",
@@ -59,7 +88,7 @@ def create_seed_data():
             first_name="Иван",
             last_name="Петров",
             role=UserRole.SUPER_ADMIN,
-            password_hash=get_password_hash("admin123")
+            password_hash=admin_hash
         )
         db.add(super_admin)
         
@@ -72,7 +101,7 @@ def create_seed_data():
             first_name="Георги",
             last_name="Димитров",
             role=UserRole.MANAGER,
-            password_hash=get_password_hash("manager123")
+            password_hash=manager_hash
         )
         db.add(manager)
         
@@ -85,20 +114,13 @@ def create_seed_data():
             first_name="Мария",
             last_name="Иванова",
             role=UserRole.RECEPTIONIST,
-            password_hash=get_password_hash("reception123")
+            password_hash=reception_hash
         )
         db.add(receptionist)
         
         # Create Mechanics
         mechanics = []
-        mechanic_names = [
-            ("Петър", "Василев", "Двигатели"),
-            ("Стоян", "Георгиев", "Ходова част"),
-            ("Красимир", "Тодоров", "Електрика"),
-            ("Николай", "Христов", "Климатици"),
-        ]
-        
-        for first, last, specialty in mechanic_names:
+        for (first, last, specialty), password_hash in zip(mechanic_names, mechanic_hashes):
             mechanic = Staff(
                 shop_id=shop.id,
                 username=first.lower() + last.lower(),
@@ -108,7 +130,7 @@ def create_seed_data():
                 last_name=last,
                 role=UserRole.MECHANIC,
                 specialty=specialty,
-                password_hash=get_password_hash("mechanic123")
+                password_hash=password_hash
             )
             db.add(mechanic)
             mechanics.append(mechanic)
@@ -118,7 +140,6 @@ def create_seed_data():
         
         # Create Customers
         print("\nCreating customers...")
-        customers = []
         bulgarian_first_names = [
             "Иван", "Георги", "Димитър", "Николай", "Петър", "Стоян", "Христо", "Васил",
             "Мария", "Елена", "Йорданка", "Ивелина", "Надежда", "Виктория", "Десислава", "Антония"
@@ -128,23 +149,29 @@ def create_seed_data():
             "Тодоров", "Илиев", "Атанасов", "Костов", "Ангелов", "Господинов", "Маринов", "Колев"
         ]
         
-        for i in range(50):
+        customer_hashes = hash_passwords([f"customer{i}" for i in range(50)])
+        
+        customer_rows = []
+        for i, password_hash in enumerate(customer_hashes):
             first_name = random.choice(bulgarian_first_names)
             last_name = random.choice(bulgarian_last_names)
             
-            customer = Customer(
+            customer_rows.append(dict(
                 shop_id=shop.id,
                 phone=f"+359888{100000 + i:06d}",
                 email=f"{first_name.lower()}.{last_name.lower()}{i}@email.bg" if i % 3 == 0 else None,
                 first_name=first_name,
                 last_name=last_name,
-                password_hash=get_password_hash(f"customer{i}"),
+                password_hash=password_hash,
                 gdpr_consent=True,
-                gdpr_consent_date=datetime.utcnow() - timedelta(days=random.randint(30, 365))
-            )
-            db.add(customer)
-            customers.append(customer)
+                gdpr_consent_date=now - timedelta(days=random.randint(30, 365))
+            ))
         
+        # Bulk INSERT ... RETURNING skips the unit-of-work for the large batches
+        customers = db.scalars(
+            insert(Customer).returning(Customer, sort_by_parameter_order=True),
+            customer_rows
+        ).all()
         db.commit()
         print(f"✓ Created {len(customers)} customers")
         
@@ -164,21 +191,26 @@ def create_seed_data():
         license_plate_letters = ["А", "В", "Е", "К", "М", "Н", "О", "Р", "С", "Т", "У", "Х"]
         license_plate_cities = ["СА", "СВ", "РВ", "РР", "ВТ", "ВН", "ПК", "ЕВ", "РА", "КН"]
         
-        cars = []
-        for i in range(70):
+        num_cars = 70
+
+        # Generate Bulgarian license plates (e.g., "СА 1234 ВК") column by column
+        plate_cities = random.choices(license_plate_cities, k=num_cars)
+        plate_numbers = random.choices(range(1000, 10000), k=num_cars)
+        plate_letters = random.choices(license_plate_letters, k=num_cars * 2)
+        license_plates = [
+            f"{city} {number} {plate_letters[2 * i]}{plate_letters[2 * i + 1]}"
+            for i, (city, number) in enumerate(zip(plate_cities, plate_numbers))
+        ]
+
+        car_rows = []
+        for license_plate in license_plates:
             make, models = random.choice(car_makes_models)
             model = random.choice(models)
             year = random.randint(2010, 2024)
-            
-            # Generate Bulgarian license plate (e.g., "СА 1234 ВК")
-            city = random.choice(license_plate_cities)
-            number = random.randint(1000, 9999)
-            letters = ''.join(random.choices(license_plate_letters, k=2))
-            license_plate = f"{city} {number} {letters}"
-            
+
             owner = random.choice(customers)
             
-            car = Car(
+            car_rows.append(dict(
                 shop_id=shop.id,
                 owner_id=owner.id,
                 make=make,
@@ -188,10 +220,12 @@ def create_seed_data():
                 color=random.choice(["Черен", "Бял", "Сив", "Син", "Червен", "Сребърен"]),
                 current_mileage=random.randint(50000, 250000),
                 service_interval_km=random.choice([10000, 15000, 20000])
-            )
-            db.add(car)
-            cars.append(car)
+            ))
         
+        cars = db.scalars(
+            insert(Car).returning(Car, sort_by_parameter_order=True),
+            car_rows
+        ).all()
         db.commit()
         print(f"✓ Created {len(cars)} cars")
         
@@ -222,8 +256,12 @@ def create_seed_data():
             ("Хладилен агент R134", "part", 1, 40),
         ]
         
+        service_indices = range(len(services))
+        part_indices = range(len(parts))
+        
         work_orders_count = 0
         invoices_count = 0
+        line_item_rows = []
         
         # Create completed work orders (past)
         for i in range(45):
@@ -232,7 +270,7 @@ def create_seed_data():
             mechanic = random.choice(mechanics)
             
             days_ago = random.randint(1, 180)
-            created_date = datetime.utcnow() - timedelta(days=days_ago)
+            created_date = now - timedelta(days=days_ago)
             started_date = created_date + timedelta(hours=random.randint(1, 4))
             completed_date = started_date + timedelta(hours=random.randint(2, 8))
             
@@ -267,35 +305,25 @@ def create_seed_data():
             
             # Add line items
             num_services = random.randint(1, 3)
-            selected_services = random.sample(services, min(num_services, len(services)))
-            selected_parts = random.sample(parts, min(num_services, len(parts)))
+            selected_services = [
+                services[j] for j in random.sample(service_indices, min(num_services, len(services)))
+            ]
+            selected_parts = [
+                parts[j] for j in random.sample(part_indices, min(num_services, len(parts)))
+            ]
             
             subtotal = 0.0
-            for service_name, item_type, qty, price in selected_services:
-                line_item = WorkOrderLineItem(
-                    work_order_id=wo.id,
-                    item_type=item_type,
-                    description=service_name,
-                    quantity=qty,
-                    unit_price=price,
-                    total_price=qty * price,
-                    added_by_staff_id=mechanic.id
-                )
-                db.add(line_item)
-                subtotal += line_item.total_price
-            
-            for part_name, item_type, qty, price in selected_parts:
-                line_item = WorkOrderLineItem(
+            for description, item_type, qty, price in selected_services + selected_parts:
+                line_item_rows.append(dict(
                     work_order_id=wo.id,
                     item_type=item_type,
-                    description=part_name,
+                    description=description,
                     quantity=qty,
                     unit_price=price,
                     total_price=qty * price,
                     added_by_staff_id=mechanic.id
-                )
-                db.add(line_item)
-                subtotal += line_item.total_price
+                ))
+                subtotal += qty * price
             
             # Create invoice
             tax_rate = 0.20
@@ -331,7 +359,7 @@ def create_seed_data():
                 customer = db.query(Customer).filter(Customer.id == car.owner_id).first()
                 mechanic = random.choice(mechanics)
                 
-                created_date = datetime.utcnow() - timedelta(days=random.randint(0, 5))
+                created_date = now - timedelta(days=random.randint(0, 5))
                 
                 wo = WorkOrder(
                     shop_id=shop.id,
@@ -352,6 +380,7 @@ def create_seed_data():
                 db.add(wo)
                 work_orders_count += 1
         
+        db.execute(insert(WorkOrderLineItem), line_item_rows)
         db.commit()
         print(f"✓ Created {work_orders_count} work orders and {invoices_count} invoices")
         
@@ -376,7 +405,7 @@ def create_seed_data():
                     "Спирачките скърцат",
                     "Нужда от смяна на гуми"
                 ]),
-                preferred_date=datetime.utcnow() + timedelta(days=random.randint(1, 7)),
+                preferred_date=now + timedelta(days=random.randint(1, 7)),
                 preferred_time=random.choice(["09:00", "10:00", "11:00", "14:00", "15:00", "16:00"]),
                 status=AppointmentStatus.REQUESTED
             )
@@ -399,13 +428,13 @@ def create_seed_data():
                     "Проблем с климатика",
                     "Смяна на ангренаж"
                 ]),
-                preferred_date=datetime.utcnow() + timedelta(days=random.randint(1, 14)),
+                preferred_date=now + timedelta(days=random.randint(1, 14)),
                 preferred_time=random.choice(["09:00", "10:00", "11:00", "14:00", "15:00", "16:00"]),
                 status=AppointmentStatus.CONFIRMED,
-                confirmed_date=datetime.utcnow() + timedelta(days=random.randint(1, 14)),
+                confirmed_date=now + timedelta(days=random.randint(1, 14)),
                 confirmed_by_staff_id=receptionist.id,
                 sms_sent=True,
-                sms_sent_at=datetime.utcnow()
+                sms_sent_at=now
             )
             db.add(appointment)
             appointments_count += 1
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from typing import List, Optional, Tuple
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func
 from app.models import Car, WorkOrder, ServiceReminder, Customer
 from app.config import settings
@@ -50,7 +50,7 @@ class MileageService:
         Predict car mileage after specified days
         Returns None if prediction not possible
         """
-        car = self.db.query(Car).filter(Car.id == car_id).first()
+        car = self.db.get(Car, car_id)
         if not car:
             return None
         
@@ -66,7 +66,7 @@ class MileageService:
         Check if car needs service reminder
         Returns (needs_reminder, predicted_mileage, service_due_mileage)
         """
-        car = self.db.query(Car).filter(Car.id == car_id).first()
+        car = self.db.get(Car, car_id)
         if not car:
             return False, None, None
         
@@ -88,40 +88,52 @@ class MileageService:
         Check all cars in a shop for service reminders
         Returns list of cars that need reminders
         """
-        cars = self.db.query(Car).filter(
-            Car.shop_id == shop_id,
-            Car.service_interval_km > 0
-        ).all()
+        # Owners are read for every reminder, so load them in one IN (...) query
+        cars = (
+            self.db.query(Car)
+            .options(selectinload(Car.owner))
+            .filter(
+                Car.shop_id == shop_id,
+                Car.service_interval_km > 0
+            )
+            .all()
+        )
         
         cars_needing_reminders = []
+        recent_cutoff = datetime.utcnow() - timedelta(days=30)
         
-        for car in cars:
-            # Check if already sent reminder recently (within last 30 days)
-            recent_reminder = (
-                self.db.query(ServiceReminder)
+        # Cars that already got a reminder recently (within last 30 days)
+        recently_reminded_car_ids = {
+            car_id for (car_id,) in (
+                self.db.query(ServiceReminder.car_id)
+                .join(Car, Car.id == ServiceReminder.car_id)
                 .filter(
-                    ServiceReminder.car_id == car.id,
+                    Car.shop_id == shop_id,
                     ServiceReminder.reminder_sent == True,
-                    ServiceReminder.reminder_sent_at >= datetime.utcnow() - timedelta(days=30)
+                    ServiceReminder.reminder_sent_at >= recent_cutoff
                 )
-                .first()
             )
-            
-            if recent_reminder:
+        }
+        
+        # Unsent reminders left over from earlier runs, reused instead of duplicated
+        pending_reminders = {}
+        for reminder in (
+            self.db.query(ServiceReminder)
+            .join(Car, Car.id == ServiceReminder.car_id)
+            .filter(Car.shop_id == shop_id, ServiceReminder.reminder_sent == False)
+            .order_by(ServiceReminder.id.desc())
+        ):
+            pending_reminders[reminder.car_id] = reminder
+        
+        for car in cars:
+            if car.id in recently_reminded_car_ids:
                 continue  # Skip if reminder sent recently
             
             needs_reminder, predicted_km, service_due_km = self.needs_service_reminder(car.id)
             
             if needs_reminder:
                 # Create or get reminder record
-                reminder = (
-                    self.db.query(ServiceReminder)
-                    .filter(
-                        ServiceReminder.car_id == car.id,
-                        ServiceReminder.reminder_sent == False
-                    )
-                    .first()
-                )
+                reminder = pending_reminders.get(car.id)
                 
                 if not reminder:
                     reminder = ServiceReminder(
@@ -132,8 +144,9 @@ class MileageService:
                         reminder_sent=False
                     )
                     self.db.add(reminder)
-                    self.db.commit()
-                    self.db.refresh(reminder)
+                    # Flush for the id only; committing here would expire every
+                    # preloaded car and owner and reload them one by one
+                    self.db.flush()
                 
                 cars_needing_reminders.append({
                     "car": car,
@@ -143,6 +156,7 @@ class MileageService:
                     "reminder_id": reminder.id
                 })
         
+        self.db.commit()
         return cars_needing_reminders
     
     def mark_reminder_sent(self, reminder_id: int):
@@ -5,17 +5,145 @@ from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from datetime import datetime
-from typing import Dict, List
+from reportlab.pdfgen import canvas
+from reportlab.lib.utils import simpleSplit
+from reportlab.lib.fonts import addMapping
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+import hashlib
+import io
+import json
+import multiprocessing
 import os
+import tempfile
+import time
+
+# TrueType fonts with Cyrillic glyphs, searched in order
+FONT_DIRS = [
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/dejavu",
+    "/Library/Fonts",
+]
+
+# Bump whenever the invoice layout changes, so cached PDFs are re-rendered
+TEMPLATE_VERSION = 2
+
+# (invoice_data, work_order_data, shop_data, customer_data, line_items)
+InvoiceJob = Tuple[Dict, Dict, Dict, Dict, List[Dict]]
+
+_FONTS_REGISTERED = False
+_FONT_NAMES = ("Helvetica", "Helvetica-Bold")
+
+
+def _register_fonts() -> Tuple[str, str]:
+    """
+    Register invoice TTFonts once per process
+    Returns (regular, bold) font names, falling back to Helvetica
+    """
+    global _FONTS_REGISTERED, _FONT_NAMES
+    if _FONTS_REGISTERED:
+        return _FONT_NAMES
+    _FONTS_REGISTERED = True
+    
+    for font_dir in FONT_DIRS:
+        regular = os.path.join(font_dir, "DejaVuSans.ttf")
+        bold = os.path.join(font_dir, "DejaVuSans-Bold.ttf")
+        if os.path.exists(regular) and os.path.exists(bold):
+            pdfmetrics.registerFont(TTFont("DejaVuSans", regular))
+            pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", bold))
+            # Let <b>/<i> markup in paragraphs resolve to the TTF faces
+            addMapping("DejaVuSans", 0, 0, "DejaVuSans")
+            addMapping("DejaVuSans", 1, 0, "DejaVuSans-Bold")
+            addMapping("DejaVuSans", 0, 1, "DejaVuSans")
+            addMapping("DejaVuSans", 1, 1, "DejaVuSans-Bold")
+            _FONT_NAMES = ("DejaVuSans", "DejaVuSans-Bold")
+            break
+    
+    return _FONT_NAMES
+
+
+FONT_NAME, FONT_NAME_BOLD = _register_fonts()
+
+
+def _fmt_date(value) -> str:
+    """Format a date/datetime (or ISO string) as DD.MM.YYYY"""
+    if not isinstance(value, date):
+        value = datetime.fromisoformat(str(value))
+    return value.strftime("%d.%m.%Y")
+
+
+def _content_hash(*parts) -> str:
+    """Stable short hash of the template and data an invoice PDF is rendered from"""
+    payload = json.dumps(parts, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
 
 
 class PDFService:
     """Service for generating PDF invoices"""
     
+    # Table styles are invariant across invoices, so build them once
+    SHOP_TABLE_STYLE = TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+    ])
+    
+    DETAILS_TABLE_STYLE = TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), FONT_NAME_BOLD),
+        ('FONTNAME', (1, 0), (1, -1), FONT_NAME),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+    ])
+    
+    ITEMS_TABLE_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),
+        ('FONTNAME', (0, 0), (-1, 0), FONT_NAME_BOLD),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -4), colors.beige),
+        ('GRID', (0, 0), (-1, -4), 1, colors.black),
+        ('FONTNAME', (0, -3), (-1, -1), FONT_NAME_BOLD),
+        ('FONTSIZE', (0, -1), (-1, -1), 14),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+    ])
+    
+    # Fixed geometry shared by both layouts (A4, SimpleDocTemplate's 1" margins)
+    MARGIN = 2.54 * cm
+    ITEM_COL_WIDTHS = [8 * cm, 2 * cm, 3 * cm, 3 * cm]
+    CELL_PADDING = 6
+    ROW_HEIGHT = 18
+    LINE_HEIGHT = 15
+    TEXT_LEADING = 12
+    
+    # Seconds an unreferenced PDF is kept after its last use
+    SWEEP_MIN_AGE = 3600
+    
     def __init__(self, output_dir: str = "./uploads/invoices"):
         self.output_dir = output_dir
-        os.makedirs(output_dir, exist_ok=True)
+        self._output_path = Path(output_dir)
+        self._output_path.mkdir(parents=True, exist_ok=True)
+        
+        # Stylesheet and title style are reused for every invoice
+        self._styles = getSampleStyleSheet()
+        self._styles['Normal'].fontName = FONT_NAME
+        self._title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=self._styles['Heading1'],
+            fontName=FONT_NAME_BOLD,
+            fontSize=24,
+            textColor=colors.HexColor('#1a1a1a'),
+            spaceAfter=30,
+        )
     
     def generate_invoice_pdf(self, invoice_data: Dict, work_order_data: Dict, 
                            shop_data: Dict, customer_data: Dict, 
@@ -24,126 +152,340 @@ class PDFService:
         Generate PDF invoice
         Returns the file path of generated PDF
         """
-        filename = f"invoice_{invoice_data['invoice_number']}.pdf"
-        filepath = os.path.join(self.output_dir, filename)
+        # Output is deterministic in its inputs and template, so key the file on
+        # their hash and skip rendering when an identical invoice already exists
+        content_hash = _content_hash(TEMPLATE_VERSION, FONT_NAME, FONT_NAME_BOLD,
+                                     invoice_data, work_order_data, shop_data,
+                                     customer_data, line_items)
+        filename = f"invoice_{invoice_data['invoice_number']}_{content_hash}.pdf"
+        filepath = str(self._output_path / filename)
+        if os.path.exists(filepath):
+            # Mark the file as in use, so the superseded-PDF sweep leaves it alone
+            os.utime(filepath)
+            return filepath
+        
+        pdf_bytes = self.generate_to_buffer(invoice_data, work_order_data, shop_data,
+                                            customer_data, line_items)
+        
+        # Write to a temp file and rename, so the cache never sees a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+            os.fchmod(f.fileno(), 0o644)
+        os.replace(tmp_path, filepath)
+        
+        return filepath
+    
+    def sweep_superseded_pdfs(self, referenced: Iterable[str]) -> int:
+        """
+        Delete invoice PDFs that no invoice points at any more
+        Files used within SWEEP_MIN_AGE are kept, as a download may still be
+        streaming them; returns the number of files removed
+        """
+        keep = {os.path.abspath(path) for path in referenced if path}
+        cutoff = time.time() - self.SWEEP_MIN_AGE
+        removed = 0
+        for path in self._output_path.glob("invoice_*.pdf"):
+            try:
+                if os.path.abspath(path) in keep or path.stat().st_mtime > cutoff:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+        return removed
+    
+    def generate_to_buffer(self, invoice_data: Dict, work_order_data: Dict, 
+                           shop_data: Dict, customer_data: Dict, 
+                           line_items: List[Dict]) -> bytes:
+        """
+        Render PDF invoice in memory
+        Returns the PDF document bytes
+        """
+        buffer = io.BytesIO()
+        if self._fits_fast_layout(shop_data, line_items):
+            self._fast_invoice(buffer, invoice_data, shop_data, customer_data, line_items)
+        else:
+            self._platypus_invoice(buffer, invoice_data, shop_data, customer_data, line_items)
+        return buffer.getvalue()
+    
+    def _invoice_details(self, invoice_data: Dict, customer_data: Dict) -> List[List[str]]:
+        """Label/value rows of the invoice details block"""
+        return [
+            ["Номер на фактура / Invoice Number:", invoice_data['invoice_number']],
+            ["Дата / Date:", _fmt_date(invoice_data['created_at'])],
+            ["Клиент / Customer:", f"{customer_data['first_name']} {customer_data['last_name']}"],
+            ["Телефон / Phone:", customer_data.get('phone') or ''],
+        ]
+    
+    def _item_rows(self, invoice_data: Dict, line_items: List[Dict]) -> Tuple[List[str], List[List[str]], List[List[str]]]:
+        """Header, line item and totals rows of the items table"""
+        header = ["Описание / Description", "Кол-во / Qty", "Цена / Price", "Сума / Total"]
+        
+        items = [
+            [
+                item['description'],
+                str(item['quantity']),
+                f"{item['unit_price']:.2f} лв.",
+                f"{item['total_price']:.2f} лв."
+            ]
+            for item in line_items
+        ]
+        
+        totals = [["", "", "Междинна сума / Subtotal:", f"{invoice_data['subtotal']:.2f} лв."]]
+        if invoice_data.get('tax_amount', 0) > 0:
+            totals.append(["", "", f"ДДС / VAT ({invoice_data.get('tax_rate', 0)*100}%):", 
+                          f"{invoice_data['tax_amount']:.2f} лв."])
+        totals.append(["", "", "ОБЩА СУМА / TOTAL:", f"{invoice_data['total']:.2f} лв."])
         
-        doc = SimpleDocTemplate(filepath, pagesize=A4)
+        return header, items, totals
+    
+    def _payment_lines(self, invoice_data: Dict) -> List[str]:
+        """Payment status lines; empty unless the invoice is paid"""
+        if invoice_data['status'] != 'paid':
+            return []
+        paid_date = _fmt_date(invoice_data.get('paid_at') or datetime.now())
+        return [
+            "ПЛАТЕНО / PAID",
+            f"Дата: {paid_date}",
+            f"Метод: {invoice_data.get('payment_method') or 'N/A'}",
+        ]
+    
+    def _shop_lines(self, shop_data: Dict) -> List[str]:
+        """Shop name, address and contact lines; missing values render empty"""
+        return [
+            str(shop_data['name']),
+            str(shop_data.get('address') or ''),
+            f"Тел: {shop_data.get('phone') or ''}",
+            f"Email: {shop_data.get('email') or ''}",
+        ]
+    
+    def _text_blocks(self, invoice_data: Dict, shop_data: Dict) -> List[List[Tuple[bool, str]]]:
+        """
+        Notes, payment status and footer as blocks of (bold, text) lines
+        Text is plain (never markup), so both layouts print the same content
+        """
+        blocks = []
+        if invoice_data.get('notes'):
+            blocks.append([(True, "Бележки / Notes:")] +
+                          [(False, line) for line in str(invoice_data['notes']).splitlines()])
+        payment_lines = self._payment_lines(invoice_data)
+        if payment_lines:
+            blocks.append([(True, payment_lines[0])] + [(False, line) for line in payment_lines[1:]])
+        blocks.append([(False, "Благодарим Ви! / Thank you!"), (False, str(shop_data.get('website') or ''))])
+        return blocks
+    
+    def _fits_fast_layout(self, shop_data: Dict, line_items: List[Dict]) -> bool:
+        """The fixed canvas layout needs every single-line cell to fit its column"""
+        shop_limit = 8 * cm - 2 * self.CELL_PADDING
+        if pdfmetrics.stringWidth(str(shop_data['name']), FONT_NAME_BOLD, 10) > shop_limit:
+            return False
+        
+        description_limit = self.ITEM_COL_WIDTHS[0] - 2 * self.CELL_PADDING
+        return all(
+            pdfmetrics.stringWidth(str(item['description']), FONT_NAME, 10) <= description_limit
+            for item in line_items
+        )
+    
+    def _fast_invoice(self, buffer: io.BytesIO, invoice_data: Dict, shop_data: Dict, 
+                      customer_data: Dict, line_items: List[Dict]):
+        """
+        Draw the invoice straight onto a canvas at precomputed positions
+        Same content as the Platypus layout without running the flowable engine
+        """
+        c = canvas.Canvas(buffer, pagesize=A4)
+        page_width, page_height = A4
+        left = self.MARGIN
+        top = page_height - self.MARGIN
+        bottom = self.MARGIN
+        pad = self.CELL_PADDING
+        
+        # Title
+        y = top - 24
+        c.setFont(FONT_NAME_BOLD, 24)
+        c.setFillColor(colors.HexColor('#1a1a1a'))
+        c.drawString(left, y, "ФАКТУРА / INVOICE")
+        c.setFillColor(colors.black)
+        y -= 30 + 0.5 * cm
+        
+        # Shop info
+        for i, text in enumerate(self._shop_lines(shop_data)):
+            y -= self.LINE_HEIGHT
+            c.setFont(FONT_NAME_BOLD if i == 0 else FONT_NAME, 10)
+            c.drawString(left + pad, y, text)
+        y -= 0.5 * cm
+        
+        # Invoice details
+        for label, value in self._invoice_details(invoice_data, customer_data):
+            y -= self.LINE_HEIGHT
+            c.setFont(FONT_NAME_BOLD, 10)
+            c.drawString(left + pad, y, label)
+            c.setFont(FONT_NAME, 10)
+            c.drawString(left + 7 * cm + pad, y, str(value))
+        y -= 1 * cm
+        
+        # Line items table, repeating the header on every new page
+        header, items, totals = self._item_rows(invoice_data, line_items)
+        y = self._draw_item_header(c, header, y)
+        for row in items:
+            if y - self.ROW_HEIGHT < bottom:
+                c.showPage()
+                y = self._draw_item_header(c, header, top)
+            self._draw_item_row(c, row, y, FONT_NAME, 10, fill=colors.beige, grid=True)
+            y -= self.ROW_HEIGHT
+        
+        for i, row in enumerate(totals):
+            is_total = i == len(totals) - 1
+            height = self.ROW_HEIGHT + (4 if is_total else 0)
+            if y - height < bottom:
+                c.showPage()
+                y = top
+            self._draw_item_row(c, row, y, FONT_NAME_BOLD, 14 if is_total else 10,
+                                fill=colors.lightgrey if is_total else None, height=height)
+            y -= height
+        y -= 1 * cm
+        
+        # Notes, payment status and footer as wrapped text blocks
+        frame_width = page_width - 2 * self.MARGIN
+        for block in self._text_blocks(invoice_data, shop_data):
+            for bold, text in block:
+                font = FONT_NAME_BOLD if bold else FONT_NAME
+                for line in simpleSplit(text, font, 10, frame_width) or [""]:
+                    if y - self.TEXT_LEADING < bottom:
+                        c.showPage()
+                        y = top
+                    y -= self.TEXT_LEADING
+                    c.setFont(font, 10)
+                    c.drawString(left, y, line)
+            y -= 0.5 * cm
+        
+        c.save()
+    
+    def _draw_item_header(self, c: canvas.Canvas, header: List[str], y: float) -> float:
+        """Draw the items table header row at y; returns the y below it"""
+        height = self.ROW_HEIGHT + 12
+        self._draw_item_row(c, header, y, FONT_NAME_BOLD, 12, fill=colors.grey, grid=True,
+                            height=height, text_color=colors.whitesmoke, baseline_offset=12)
+        return y - height
+    
+    def _draw_item_row(self, c: canvas.Canvas, cells: List[str], y: float, font: str, size: float,
+                       fill=None, grid: bool = False, height: Optional[float] = None,
+                       text_color=colors.black, baseline_offset: float = 5):
+        """Draw one items table row whose top edge is at y"""
+        height = height or self.ROW_HEIGHT
+        x = self.MARGIN
+        bottom = y - height
+        
+        if fill is not None:
+            c.setFillColor(fill)
+            c.rect(x, bottom, sum(self.ITEM_COL_WIDTHS), height, stroke=0, fill=1)
+        
+        c.setFont(font, size)
+        c.setFillColor(text_color)
+        for col, (text, width) in enumerate(zip(cells, self.ITEM_COL_WIDTHS)):
+            if grid:
+                c.rect(x, bottom, width, height, stroke=1, fill=0)
+            if col == 0:
+                c.drawString(x + self.CELL_PADDING, bottom + baseline_offset, text)
+            else:
+                c.drawRightString(x + width - self.CELL_PADDING, bottom + baseline_offset, text)
+            x += width
+        c.setFillColor(colors.black)
+    
+    def _platypus_invoice(self, buffer: io.BytesIO, invoice_data: Dict, shop_data: Dict, 
+                          customer_data: Dict, line_items: List[Dict]):
+        """Lay the invoice out with Platypus flowables (wraps overlong cells)"""
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
         story = []
-        styles = getSampleStyleSheet()
+        styles = self._styles
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a1a1a'),
-            spaceAfter=30,
-        )
-        title = Paragraph(f"ФАКТУРА / INVOICE", title_style)
+        title = Paragraph(f"ФАКТУРА / INVOICE", self._title_style)
         story.append(title)
         story.append(Spacer(1, 0.5 * cm))
         
         # Shop info
-        shop_info = [
-            [Paragraph(f"<b>{shop_data['name']}</b>", styles['Normal'])],
-            [shop_data.get('address', '')],
-            [f"Тел: {shop_data.get('phone', '')}"],
-            [f"Email: {shop_data.get('email', '')}"],
-        ]
+        shop_name, *shop_contact = self._shop_lines(shop_data)
+        shop_info = [[Paragraph(f"<b>{escape(shop_name)}</b>", styles['Normal'])]]
+        shop_info += [[line] for line in shop_contact]
         shop_table = Table(shop_info, colWidths=[8 * cm])
-        shop_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ]))
+        shop_table.setStyle(self.SHOP_TABLE_STYLE)
         story.append(shop_table)
         story.append(Spacer(1, 0.5 * cm))
         
         # Invoice details
-        invoice_details = [
-            ["Номер на фактура / Invoice Number:", invoice_data['invoice_number']],
-            ["Дата / Date:", datetime.fromisoformat(str(invoice_data['created_at'])).strftime("%d.%m.%Y")],
-            ["Клиент / Customer:", f"{customer_data['first_name']} {customer_data['last_name']}"],
-            ["Телефон / Phone:", customer_data.get('phone', '')],
-        ]
+        invoice_details = self._invoice_details(invoice_data, customer_data)
         
         details_table = Table(invoice_details, colWidths=[7 * cm, 7 * cm])
-        details_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ]))
+        details_table.setStyle(self.DETAILS_TABLE_STYLE)
         story.append(details_table)
         story.append(Spacer(1, 1 * cm))
         
-        # Line items table
-        data = [["Описание / Description", "Кол-во / Qty", "Цена / Price", "Сума / Total"]]
-        
-        for item in line_items:
-            data.append([
-                item['description'],
-                str(item['quantity']),
-                f"{item['unit_price']:.2f} лв.",
-                f"{item['total_price']:.2f} лв."
-            ])
+        # Line items table (descriptions wrap, unlike the canvas fast path)
+        header, items, totals = self._item_rows(invoice_data, line_items)
+        data = [header]
+        data += [[Paragraph(escape(row[0]), styles['Normal'])] + row[1:] for row in items]
+        data += totals
         
-        # Totals
-        data.append(["", "", "Междинна сума / Subtotal:", f"{invoice_data['subtotal']:.2f} лв."])
-        if invoice_data.get('tax_amount', 0) > 0:
-            data.append(["", "", f"ДДС / VAT ({invoice_data.get('tax_rate', 0)*100}%):", 
-                        f"{invoice_data['tax_amount']:.2f} лв."])
-        data.append(["", "", "ОБЩА СУМА / TOTAL:", f"{invoice_data['total']:.2f} лв."])
-        
-        items_table = Table(data, colWidths=[8 * cm, 2 * cm, 3 * cm, 3 * cm])
-        items_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -4), colors.beige),
-            ('GRID', (0, 0), (-1, -4), 1, colors.black),
-            ('FONTNAME', (0, -3), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 14),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-        ]))
+        items_table = Table(data, colWidths=self.ITEM_COL_WIDTHS)
+        items_table.setStyle(self.ITEMS_TABLE_STYLE)
         story.append(items_table)
         story.append(Spacer(1, 1 * cm))
         
-        # Notes
-        if invoice_data.get('notes'):
-            notes = Paragraph(f"<b>Бележки / Notes:</b><br/>{invoice_data['notes']}", styles['Normal'])
-            story.append(notes)
-            story.append(Spacer(1, 0.5 * cm))
-        
-        # Payment status
-        if invoice_data['status'] == 'paid':
-            paid_date = datetime.fromisoformat(str(invoice_data.get('paid_at', datetime.now()))).strftime("%d.%m.%Y")
-            payment_info = Paragraph(
-                f"<b>ПЛАТЕНО / PAID</b><br/>Дата: {paid_date}<br/>Метод: {invoice_data.get('payment_method', 'N/A')}",
-                styles['Normal']
+        # Notes, payment status and footer; text is escaped so it prints literally
+        for block in self._text_blocks(invoice_data, shop_data):
+            markup = "<br/>".join(
+                f"<b>{escape(text)}</b>" if bold else escape(text) for bold, text in block
             )
-            story.append(payment_info)
-        
-        # Footer
-        story.append(Spacer(1, 1 * cm))
-        footer = Paragraph(
-            f"<i>Благодарим Ви! / Thank you!</i><br/>{shop_data.get('website', '')}",
-            styles['Normal']
-        )
-        story.append(footer)
+            story.append(Paragraph(markup, styles['Normal']))
+            story.append(Spacer(1, 0.5 * cm))
         
         # Build PDF
         doc.build(story)
+    
+    def generate_invoices_bulk(self, jobs: List[InvoiceJob],
+                               max_workers: Optional[int] = None) -> List[str]:
+        """
+        Generate many PDF invoices in parallel worker processes
+        Each job is the argument tuple of generate_invoice_pdf
+        Returns the file paths in the same order as jobs
+        """
+        if not jobs:
+            return []
         
-        return filepath
+        max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+        if max_workers == 1:
+            # Not worth paying process start-up for a single worker
+            return [self.generate_invoice_pdf(*job) for job in jobs]
+        
+        # ReportLab layout is pure Python and holds the GIL, so use processes.
+        # Spawn them: forking a multithreaded server (uvicorn, APScheduler)
+        # can copy a held lock into the child and deadlock it
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_bulk_worker,
+            initargs=(self.output_dir,)
+        ) as pool:
+            return list(pool.map(_generate_bulk_job, jobs))
+
+
+# Per-process service used by generate_invoices_bulk workers
+_bulk_worker_service: Optional[PDFService] = None
+
+
+def _init_bulk_worker(output_dir: str):
+    """Build one PDFService per worker process"""
+    global _bulk_worker_service
+    _bulk_worker_service = PDFService(output_dir)
+
+
+def _generate_bulk_job(job: InvoiceJob) -> str:
+    """Render a single bulk job inside a worker process"""
+    return _bulk_worker_service.generate_invoice_pdf(*job)
 
 
+@lru_cache(maxsize=1)
 def get_pdf_service() -> PDFService:
-    """Dependency to get PDF service instance"""
+    """Dependency to get the shared PDF service instance"""
     return PDFService()
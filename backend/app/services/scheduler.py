@@ -1,10 +1,12 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
-from app.models import Shop
+from app.models import Invoice, Shop
 from app.services.mileage import MileageService
+from app.services.pdf import get_pdf_service
 from app.services.sms import SMSService
 from app.config import settings
 import logging
@@ -19,52 +21,87 @@ def check_service_reminders():
     """
     logger.info(f"Running service reminder check at {datetime.now()}")
     
-    db = SessionLocal()
     try:
-        # Get all active shops
-        shops = db.query(Shop).filter(Shop.is_active == True, Shop.sms_enabled == True).all()
+        # Only the ids are loaded up front; each shop then gets its own
+        # short-lived session so no transaction or identity map outlives it
+        with SessionLocal() as db:
+            shop_ids = db.scalars(
+                select(Shop.id).where(Shop.is_active == True, Shop.sms_enabled == True)
+            ).all()
+    except Exception as e:
+        logger.error(f"Error in service reminder check: {str(e)}")
+        return
+    
+    for shop_id in shop_ids:
+        try:
+            # The cars and owners loaded for the messages are still read after the
+            # reminder commits; keep them loaded rather than re-SELECT each one
+            with SessionLocal(expire_on_commit=False) as db:
+                _send_shop_reminders(db, shop_id)
+        except Exception as e:
+            logger.error(f"Error in service reminder check for shop {shop_id}: {str(e)}")
+
+
+def _send_shop_reminders(db: Session, shop_id: int):
+    """Send due service reminders for one shop"""
+    shop = db.get(Shop, shop_id)
+    logger.info(f"Checking service reminders for shop: {shop.name} (ID: {shop.id})")
+    
+    mileage_service = MileageService(db)
+    sms_service = SMSService(db)
+    
+    # Get cars needing reminders
+    cars_needing_reminders = mileage_service.check_all_cars_for_reminders(shop.id)
+    
+    logger.info(f"Found {len(cars_needing_reminders)} cars needing reminders")
+    
+    # Build all reminder messages, then send them concurrently
+    messages = []
+    for item in cars_needing_reminders:
+        car = item["car"]
+        customer = item["customer"]
         
-        for shop in shops:
-            logger.info(f"Checking service reminders for shop: {shop.name} (ID: {shop.id})")
-            
-            mileage_service = MileageService(db)
-            sms_service = SMSService(db)
-            
-            # Get cars needing reminders
-            cars_needing_reminders = mileage_service.check_all_cars_for_reminders(shop.id)
-            
-            logger.info(f"Found {len(cars_needing_reminders)} cars needing reminders")
-            
-            # Send reminders
-            for item in cars_needing_reminders:
-                car = item["car"]
-                customer = item["customer"]
-                predicted_km = item["predicted_mileage"]
-                reminder_id = item["reminder_id"]
-                
-                car_info = f"{car.make} {car.model} ({car.license_plate})"
-                customer_name = f"{customer.first_name} {customer.last_name}"
-                
-                # Send SMS
-                success = sms_service.send_service_reminder_sms(
-                    shop_id=shop.id,
-                    customer_phone=customer.phone,
-                    customer_name=customer_name,
-                    car_info=car_info,
-                    predicted_km=predicted_km,
-                    shop_website=shop.website or settings.SHOP_WEBSITE
-                )
-                
-                if success:
-                    mileage_service.mark_reminder_sent(reminder_id)
-                    logger.info(f"Sent reminder for car {car.id} to {customer.phone}")
-                else:
-                    logger.error(f"Failed to send reminder for car {car.id} to {customer.phone}")
+        car_info = f"{car.make} {car.model} ({car.license_plate})"
+        customer_name = f"{customer.first_name} {customer.last_name}"
+        
+        messages.append((
+            customer.phone,
+            sms_service.service_reminder_message(
+                customer_name=customer_name,
+                car_info=car_info,
+                predicted_km=item["predicted_mileage"],
+                shop_website=shop.website or settings.SHOP_WEBSITE
+            )
+        ))
+    
+    results = sms_service.send_bulk_sms(shop.id, messages, "service_reminder")
+    
+    for item, success in zip(cars_needing_reminders, results):
+        car = item["car"]
+        customer = item["customer"]
+        reminder_id = item["reminder_id"]
         
+        if success:
+            mileage_service.mark_reminder_sent(reminder_id)
+            logger.info(f"Sent reminder for car {car.id} to {customer.phone}")
+        else:
+            logger.error(f"Failed to send reminder for car {car.id} to {customer.phone}")
+    
+    sms_service.flush_logs()
+
+
+def sweep_invoice_pdfs():
+    """
+    Background job to delete invoice PDFs superseded by a newer render
+    Runs daily; files still referenced by an invoice are kept
+    """
+    try:
+        with SessionLocal() as db:
+            referenced = db.scalars(select(Invoice.pdf_url).where(Invoice.pdf_url.isnot(None))).all()
+        removed = get_pdf_service().sweep_superseded_pdfs(referenced)
+        logger.info(f"Removed {removed} superseded invoice PDFs")
     except Exception as e:
-        logger.error(f"Error in service reminder check: {str(e)}")
-    finally:
-        db.close()
+        logger.error(f"Error in invoice PDF sweep: {str(e)}")
 
 
 class SchedulerService:
@@ -90,6 +127,15 @@ class SchedulerService:
         )
         
         logger.info(f"Scheduled service reminder check at {settings.MILEAGE_CHECK_HOUR}:00 daily")
+        
+        # Nightly sweep of superseded invoice PDFs, outside business hours
+        self.scheduler.add_job(
+            sweep_invoice_pdfs,
+            trigger=CronTrigger(hour=3, minute=30),
+            id="invoice_pdf_sweep",
+            name="Sweep superseded invoice PDFs",
+            replace_existing=True
+        )
     
     def start(self):
         """Start the scheduler"""
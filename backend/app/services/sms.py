@@ -1,7 +1,10 @@
-from typing import Optional
+import asyncio
+from typing import List, Optional, Tuple
 from datetime import datetime
 from twilio.rest import Client
+from twilio.http.async_http_client import AsyncTwilioHttpClient
 from twilio.base.exceptions import TwilioRestException
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.models import SMSLog, Shop
@@ -10,6 +13,9 @@ from app.models import SMSLog, Shop
 class SMSService:
     """Service for sending SMS notifications via Twilio"""
     
+    # Concurrent requests per bulk send
+    BULK_SMS_CONCURRENCY = 10
+    
     def __init__(self, db: Session):
         self.db = db
         self.client = None
@@ -19,7 +25,10 @@ class SMSService:
     def _log_sms(self, shop_id: int, recipient_phone: str, message_type: str, 
                  message_body: str, twilio_sid: Optional[str] = None, 
                  status: str = "sent", error_message: Optional[str] = None):
-        """Log SMS message to database"""
+        """
+        Log SMS message to database
+        Only stages the writes; callers commit, or call flush_logs()
+        """
         sms_log = SMSLog(
             shop_id=shop_id,
             recipient_phone=recipient_phone,
@@ -31,11 +40,15 @@ class SMSService:
         )
         self.db.add(sms_log)
         
-        # Increment shop SMS usage count
-        shop = self.db.query(Shop).filter(Shop.id == shop_id).first()
-        if shop:
-            shop.sms_usage_count += 1
-        
+        # Increment shop SMS usage count atomically, without reading the shop
+        self.db.execute(
+            update(Shop)
+            .where(Shop.id == shop_id)
+            .values(sms_usage_count=Shop.sms_usage_count + 1)
+        )
+    
+    def flush_logs(self):
+        """Commit SMS logs and usage counts staged by previous sends"""
         self.db.commit()
     
     def send_sms(self, shop_id: int, recipient_phone: str, message_body: str, 
@@ -66,6 +79,67 @@ class SMSService:
                          status="failed", error_message=str(e))
             return False
     
+    def send_bulk_sms(self, shop_id: int, messages: List[Tuple[str, str]], 
+                      message_type: str = "generic") -> List[bool]:
+        """
+        Send many SMS messages concurrently
+        messages: list of (recipient_phone, message_body)
+        Returns a success flag per message, in the same order
+        """
+        if not messages:
+            return []
+        
+        if not self.client:
+            for recipient_phone, message_body in messages:
+                self._log_sms(shop_id, recipient_phone, message_type, message_body, 
+                             status="failed", error_message="SMS service not configured")
+            return [False] * len(messages)
+        
+        results = asyncio.run(self._send_many_async(messages))
+        
+        # Log from this thread once all requests are done; the session is not shared
+        sent = []
+        for (recipient_phone, message_body), result in zip(messages, results):
+            if isinstance(result, Exception):
+                # Twilio errors and transport failures (resets, timeouts) alike:
+                # one bad request must not lose the logs of the ones delivered
+                self._log_sms(shop_id, recipient_phone, message_type, message_body, 
+                             status="failed", error_message=str(result) or type(result).__name__)
+                sent.append(False)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                self._log_sms(shop_id, recipient_phone, message_type, message_body, 
+                             twilio_sid=result.sid, status="sent")
+                sent.append(True)
+        return sent
+    
+    async def _send_many_async(self, messages: List[Tuple[str, str]]) -> list:
+        """
+        Issue Twilio requests concurrently over one pooled async HTTP client
+        At most BULK_SMS_CONCURRENCY are in flight, to stay under Twilio's rate limit
+        """
+        http_client = AsyncTwilioHttpClient()
+        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, 
+                        http_client=http_client)
+        semaphore = asyncio.Semaphore(self.BULK_SMS_CONCURRENCY)
+        
+        async def send_one(recipient_phone: str, message_body: str):
+            async with semaphore:
+                return await client.messages.create_async(
+                    body=message_body,
+                    from_=settings.TWILIO_PHONE_NUMBER,
+                    to=recipient_phone
+                )
+        
+        try:
+            return await asyncio.gather(
+                *[send_one(recipient_phone, message_body) for recipient_phone, message_body in messages],
+                return_exceptions=True
+            )
+        finally:
+            await http_client.close()
+    
     def send_welcome_sms(self, shop_id: int, customer_phone: str, 
                         customer_name: str, password: str, shop_website: str) -> bool:
         """Send welcome SMS with auto-generated password"""
@@ -105,17 +179,23 @@ class SMSService:
         )
         return self.send_sms(shop_id, customer_phone, message, "car_ready")
     
-    def send_service_reminder_sms(self, shop_id: int, customer_phone: str, 
-                                 customer_name: str, car_info: str, 
-                                 predicted_km: int, shop_website: str) -> bool:
-        """Send proactive service reminder SMS"""
-        message = (
+    @staticmethod
+    def service_reminder_message(customer_name: str, car_info: str, 
+                                 predicted_km: int, shop_website: str) -> str:
+        """Build proactive service reminder SMS text"""
+        return (
             f"Здравейте {customer_name},\n"
             f"Вашият {car_info} скоро ще достигне {predicted_km} km и "
             f"е време за сервизно обслужване.\n"
             f"Запазете час на: {shop_website}\n"
             f"{settings.SHOP_NAME} | {settings.SHOP_PHONE}"
         )
+    
+    def send_service_reminder_sms(self, shop_id: int, customer_phone: str, 
+                                 customer_name: str, car_info: str, 
+                                 predicted_km: int, shop_website: str) -> bool:
+        """Send proactive service reminder SMS"""
+        message = self.service_reminder_message(customer_name, car_info, predicted_km, shop_website)
         return self.send_sms(shop_id, customer_phone, message, "service_reminder")
     
     def send_password_reset_sms(self, shop_id: int, customer_phone: str, 
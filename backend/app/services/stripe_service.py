@@ -1,7 +1,44 @@
 import stripe
-from typing import Optional
+import threading
+import time
+from typing import Dict, Optional, Tuple
 from app.config import settings
 
+# Short-lived cache of confirm_payment results, keyed by payment intent id,
+# so frontend polling and webhooks don't each hit the Stripe API
+INTENT_CACHE_TTL = 5
+INTENT_CACHE_MAXSIZE = 10000
+_intent_cache: Dict[str, Tuple[float, dict]] = {}
+_intent_cache_lock = threading.Lock()
+
+
+def _get_cached_intent(payment_intent_id: str) -> Optional[dict]:
+    """Return the cached confirm result if it hasn't expired"""
+    with _intent_cache_lock:
+        entry = _intent_cache.get(payment_intent_id)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            _intent_cache.pop(payment_intent_id, None)
+            return None
+        return dict(result)
+
+
+def _cache_intent(payment_intent_id: str, result: dict):
+    """Store a confirm result, evicting the oldest entry when full"""
+    with _intent_cache_lock:
+        _intent_cache.pop(payment_intent_id, None)
+        if len(_intent_cache) >= INTENT_CACHE_MAXSIZE:
+            _intent_cache.pop(next(iter(_intent_cache)))
+        _intent_cache[payment_intent_id] = (time.monotonic() + INTENT_CACHE_TTL, dict(result))
+
+
+def invalidate_intent_cache(payment_intent_id: str):
+    """Drop any cached confirm result for a payment intent"""
+    with _intent_cache_lock:
+        _intent_cache.pop(payment_intent_id, None)
+
 
 class StripeService:
     """Service for Stripe payment processing"""
@@ -41,14 +78,20 @@ class StripeService:
             }
     
     def confirm_payment(self, payment_intent_id: str) -> dict:
-        """Confirm a payment intent"""
+        """Confirm a payment intent (cached for INTENT_CACHE_TTL seconds)"""
+        cached = _get_cached_intent(payment_intent_id)
+        if cached is not None:
+            return cached
+        
         try:
             intent = stripe.PaymentIntent.retrieve(payment_intent_id)
-            return {
+            result = {
                 "success": True,
                 "status": intent.status,
                 "amount": intent.amount / 100  # Convert back to leva
             }
+            _cache_intent(payment_intent_id, result)
+            return result
         except stripe.error.StripeError as e:
             return {
                 "success": False,
@@ -57,12 +100,14 @@ class StripeService:
     
     def refund_payment(self, payment_intent_id: str, amount: Optional[float] = None) -> dict:
         """Refund a payment"""
+        invalidate_intent_cache(payment_intent_id)
         try:
             refund_params = {"payment_intent": payment_intent_id}
             if amount:
                 refund_params["amount"] = int(amount * 100)
             
             refund = stripe.Refund.create(**refund_params)
+            invalidate_intent_cache(payment_intent_id)
             
             return {
                 "success": True,
@@ -1,6 +1,10 @@
+from calendar import timegm
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from functools import lru_cache
+from typing import Optional, Tuple
+import time
+import orjson
+from jose import JOSEError, jwk, jws
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -10,8 +14,9 @@ from app.database import get_db
 from app.models import Staff, Customer, UserRole
 from app.schemas import TokenData
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: new hashes use Argon2id, while legacy bcrypt hashes still
+# verify and are upgraded on the user's next successful login
+pwd_context = CryptContext(schemes=["argon2", "bcrypt"], default="argon2", deprecated="auto")
 
 # JWT token scheme
 security = HTTPBearer()
@@ -22,6 +27,15 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password against its hash
+    Returns (verified, new_hash); new_hash is set when the stored hash
+    uses a deprecated scheme and should be replaced
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
@@ -38,8 +52,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return _encode_token(to_encode)
 
 
 def create_refresh_token(data: dict) -> str:
@@ -50,24 +63,64 @@ def create_refresh_token(data: dict) -> str:
         to_encode["sub"] = str(to_encode["sub"])
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return _encode_token(to_encode)
+
+
+@lru_cache(maxsize=1)
+def _signing_key():
+    """
+    Build the JWT key object once; jws otherwise re-parses the secret
+    (and probes it as JSON/PEM) on every sign and verify
+    """
+    return jwk.construct(settings.SECRET_KEY, settings.ALGORITHM)
+
+
+def _encode_token(claims: dict) -> str:
+    """
+    Sign JWT claims, serializing them with orjson
+    jws.sign takes pre-encoded bytes as-is, so jose's stdlib json is skipped
+    """
+    claims["exp"] = timegm(claims["exp"].utctimetuple())
+    return jws.sign(orjson.dumps(claims), _signing_key(), algorithm=settings.ALGORITHM)
+
+
+@lru_cache(maxsize=4096)
+def _decode_token_cached(token: str) -> Tuple[TokenData, float]:
+    """
+    Verify a JWT and return its token data with the expiry timestamp
+    Tokens are immutable strings, so results are cached by the raw token;
+    failures raise and are therefore never cached. Only the signature is
+    verified here; expiry is checked by decode_token on every call
+    """
+    payload = orjson.loads(jws.verify(token, _signing_key(), algorithms=[settings.ALGORITHM]))
+    if not isinstance(payload, dict):
+        raise ValueError("Token payload is not an object")
+    # jws.verify checks only the signature, so validate the claims jose's
+    # jwt.decode used to: sub must be a string and exp must be present
+    user_id_str: str = payload.get("sub")
+    role: str = payload.get("role")
+    shop_id: int = payload.get("shop_id")
+    if not isinstance(user_id_str, str):
+        raise ValueError("Token subject is missing or not a string")
+    # Convert string sub back to integer user_id
+    user_id = int(user_id_str)
+    token_data = TokenData(user_id=user_id, role=UserRole(role), shop_id=shop_id)
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, bool) or not isinstance(expires_at, (int, float)):
+        raise ValueError("Token expiry is missing or not a number")
+    return token_data, expires_at
 
 
 def decode_token(token: str) -> TokenData:
     """Decode and validate JWT token"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id_str: str = payload.get("sub")
-        role: str = payload.get("role")
-        shop_id: int = payload.get("shop_id")
-        if user_id_str is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        # Convert string sub back to integer user_id
-        user_id = int(user_id_str)
-        return TokenData(user_id=user_id, role=UserRole(role), shop_id=shop_id)
-    except (JWTError, ValueError):
+        token_data, expires_at = _decode_token_cached(token)
+    except (JOSEError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    # Cached entries outlive the token, so re-check expiry on every hit
+    if expires_at <= time.time():
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return token_data.model_copy()
 
 
 def get_current_user(
@@ -78,10 +131,10 @@ def get_current_user(
     token = credentials.credentials
     token_data = decode_token(token)
 
-    if token_data.role == UserRole.CUSTOMER:
-        user = db.query(Customer).filter(Customer.id == token_data.user_id).first()
-    else:
-        user = db.query(Staff).filter(Staff.id == token_data.user_id).first()
+    # The role claim tells us which table to look in; db.get() checks the
+    # identity map first and only emits a primary-key SELECT on a miss
+    user_model = Customer if token_data.role == UserRole.CUSTOMER else Staff
+    user = db.get(user_model, token_data.user_id)
 
     if user:
         return user
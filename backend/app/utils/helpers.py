@@ -1,14 +1,27 @@
+import re
 import secrets
 import string
 import phonenumbers
 from typing import Optional
 
+# Bulgarian mobile numbers already in E.164 form (+359 87/88/89/98 XXX XXXX)
+_BG_MOBILE_E164 = re.compile(r'\+359(?:8[7-9]|98)\d{7}')
+
+
+PASSWORD_ALPHABET = string.ascii_letters + string.digits
+
 
 def generate_password(length: int = 8) -> str:
     """Generate a random password"""
-    alphabet = string.ascii_letters + string.digits
-    password = ''.join(secrets.choice(alphabet) for _ in range(length))
-    return password
+    # One CSPRNG draw covering every password of this length, then written
+    # out in base len(alphabet); uniform over the same alphabet as before
+    base = len(PASSWORD_ALPHABET)
+    value = secrets.randbelow(base ** length)
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, base)
+        chars.append(PASSWORD_ALPHABET[index])
+    return ''.join(chars)
 
 
 def validate_phone_number(phone: str, country_code: str = "BG") -> Optional[str]:
@@ -16,6 +29,11 @@ def validate_phone_number(phone: str, country_code: str = "BG") -> Optional[str]
     Validate and format phone number
     Returns formatted phone number or None if invalid
     """
+    # Fast path: most input is a BG mobile number that is already valid E.164;
+    # fullmatch, since $ would also accept a trailing newline
+    if country_code == "BG" and _BG_MOBILE_E164.fullmatch(phone):
+        return phone
+    
     try:
         parsed = phonenumbers.parse(phone, country_code)
         if phonenumbers.is_valid_number(parsed):
@@ -1,42 +1,131 @@
 """
 Pytest configuration and fixtures for backend tests
 """
+import os
+
+# Keep the app's own engine (used by its startup create_all) off the shared
+# ./autoshop.db file, so concurrent pytest-xdist workers never race on it.
+# Must be set before app.config is imported.
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ENABLE_SCHEDULER", "false")
+
+import factory
+import httpx
+import orjson
 import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from functools import lru_cache
+from factory.alchemy import SQLAlchemyModelFactory
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.database import Base, get_db
-from app.models import Shop, Staff, Customer, UserRole
-from app.utils.auth import get_password_hash
+from app.models import Shop, Staff, Customer, Car, WorkOrder, WorkOrderStatus, SMSLog, UserRole
+from app.utils.auth import create_access_token, get_password_hash, pwd_context
 
-# Test database URL (in-memory SQLite for isolation)
+# Test database URL (in-memory SQLite for isolation; each xdist worker is a
+# separate process and therefore gets its own database)
 TEST_DATABASE_URL = "sqlite:///:memory:"
 
-# Create test engine
+# Create test engine; StaticPool shares the single in-memory connection
+# across threads, so the app's threadpool sees the same database
 test_engine = create_engine(
     TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool
 )
 
+
+@event.listens_for(test_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Skip durability work the throwaway test database doesn't need"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.close()
+    # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work with pysqlite
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(test_engine, "begin")
+def _begin_sqlite_transaction(conn):
+    """Start the transaction pysqlite no longer begins implicitly"""
+    conn.exec_driver_sql("BEGIN")
+
+
 # Create test session factory
 TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# Use minimal hashing cost in tests; the algorithms themselves are unchanged
+pwd_context.update(
+    argon2__memory_cost=8,
+    argon2__time_cost=1,
+    argon2__parallelism=1,
+    bcrypt__rounds=4
+)
 
-@pytest.fixture(scope="function")
-def db():
-    """Create a fresh database for each test"""
+# Every fixture user shares the same password, so hash it once per session
+_TESTPASS_HASH = get_password_hash("testpass123")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def orjson_response_json():
+    """
+    Decode test response bodies with orjson (TestClient and AsyncClient both
+    return httpx responses); the original method is restored at teardown
+    """
+    stdlib_json = httpx.Response.json
+    
+    def json(self, **kwargs):
+        if kwargs:
+            return stdlib_json(self, **kwargs)
+        return orjson.loads(self.content)
+    
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(httpx.Response, "json", json)
+        yield
+
+
+@pytest.fixture(scope="session")
+def db_schema():
+    """Create the schema once for the whole test session"""
     Base.metadata.create_all(bind=test_engine)
-    db = TestSessionLocal()
+    yield
+    Base.metadata.drop_all(bind=test_engine)
+
+
+@pytest.fixture(scope="function")
+def db(db_schema):
+    """
+    Run each test inside a transaction that is rolled back afterwards
+    Session commits only release a SAVEPOINT, so every test sees a clean DB
+    """
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    db = TestSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=test_engine)
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """
+    One TestClient for the whole session, so app startup/shutdown run once
+    Redirects are not followed, so a slash redirect shows up as a 307 status
+    """
+    with TestClient(app, follow_redirects=False) as test_client:
+        yield test_client
 
 
 @pytest.fixture(scope="function")
-def client(db):
+def client(app_client, db):
     """Create a test client with test database"""
     def override_get_db():
         try:
@@ -45,7 +134,27 @@ def client(db):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
+    yield app_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
+def client_no_db():
+    """
+    Test client for requests rejected before any DB access (auth failures)
+    Skips the per-test transaction and the app's startup hooks
+    """
+    return TestClient(app, follow_redirects=False)
+
+
+@pytest_asyncio.fixture
+async def async_client(db):
+    """Create an async httpx client that calls the app in-process"""
+    def override_get_db():
+        yield db
+    
+    app.dependency_overrides[get_db] = override_get_db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
@@ -62,8 +171,7 @@ def test_shop(db):
         is_active=True
     )
     db.add(shop)
-    db.commit()
-    db.refresh(shop)
+    db.flush()
     return shop
 
 
@@ -75,15 +183,14 @@ def test_staff(db, test_shop):
         username="teststaff",
         email="staff@test.com",
         phone="+1234567891",
-        password_hash=get_password_hash("testpass123"),
+        password_hash=_TESTPASS_HASH,
         first_name="Test",
         last_name="Staff",
         role=UserRole.RECEPTIONIST,
         is_active=True
     )
     db.add(staff)
-    db.commit()
-    db.refresh(staff)
+    db.flush()
     return staff
 
 
@@ -94,14 +201,13 @@ def test_customer(db, test_shop):
         shop_id=test_shop.id,
         phone="+1234567892",
         email="customer@test.com",
-        password_hash=get_password_hash("testpass123"),
+        password_hash=_TESTPASS_HASH,
         first_name="Test",
         last_name="Customer",
         is_active=True
     )
     db.add(customer)
-    db.commit()
-    db.refresh(customer)
+    db.flush()
     return customer
 
 
@@ -113,13 +219,135 @@ def inactive_staff(db, test_shop):
         username="inactivestaff",
         email="inactive@test.com",
         phone="+1234567893",
-        password_hash=get_password_hash("testpass123"),
+        password_hash=_TESTPASS_HASH,
         first_name="Inactive",
         last_name="Staff",
         role=UserRole.MECHANIC,
         is_active=False
     )
     db.add(staff)
-    db.commit()
-    db.refresh(staff)
+    db.flush()
     return staff
+
+
+@pytest.fixture
+def receptionist(db, test_shop):
+    """Create a staff member with the receptionist role"""
+    staff = Staff(
+        shop_id=test_shop.id,
+        username="receptionist",
+        email="receptionist@test.com",
+        phone="+1234567894",
+        password_hash=_TESTPASS_HASH,
+        first_name="Test",
+        last_name="Receptionist",
+        role=UserRole.RECEPTIONIST,
+        is_active=True
+    )
+    db.add(staff)
+    db.flush()
+    return staff
+
+
+@pytest.fixture
+def car_and_wo(request, db, test_shop, test_customer):
+    """
+    Car with one work order for the test customer, flushed together
+    Parametrize indirectly with {"car": {...}, "work_order": {...}} field overrides
+    """
+    fields = getattr(request, "param", {})
+    car = Car(
+        shop_id=test_shop.id,
+        owner_id=test_customer.id,
+        **{"make": "Toyota", "model": "Camry", "license_plate": "TEST123", "current_mileage": 50000,
+           **fields.get("car", {})}
+    )
+    work_order = WorkOrder(
+        shop_id=test_shop.id,
+        customer_id=test_customer.id,
+        car=car,
+        **{"reported_issues": "Engine noise", "status": WorkOrderStatus.CREATED,
+           **fields.get("work_order", {})}
+    )
+    db.add_all([car, work_order])
+    db.flush()
+    return car, work_order
+
+
+@lru_cache(maxsize=64)
+def _access_token(user_id, role, shop_id):
+    """
+    Sign each (user, role, shop) token once per session
+    Valid for a day, so slow or debugged runs don't outlive the cached token
+    """
+    return create_access_token(
+        data={"sub": user_id, "role": role, "shop_id": shop_id},
+        expires_delta=timedelta(days=1)
+    )
+
+
+@pytest.fixture
+def staff_access_token(test_staff):
+    """Access token for the test staff member, minted without a login round-trip"""
+    return _access_token(test_staff.id, test_staff.role.value, test_staff.shop_id)
+
+
+@pytest.fixture
+def staff_auth_headers(staff_access_token):
+    """Authorization headers for the test staff member"""
+    return {"Authorization": f"Bearer {staff_access_token}"}
+
+
+@pytest.fixture
+def staff_login_headers(client, test_staff):
+    """Authorization headers from a real staff login through the API"""
+    response = client.post(
+        "/api/auth/staff/login",
+        json={"username": "teststaff", "password": "testpass123"}
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class SMSLogFactory(SQLAlchemyModelFactory):
+    """Builds sent welcome SMS logs; use the sms_log_factory fixture to bind a session"""
+    
+    class Meta:
+        model = SMSLog
+        sqlalchemy_session = None
+    
+    recipient_phone = factory.Sequence(lambda n: f"+1{n:010d}")
+    message_type = "welcome"
+    message_body = "Welcome!"
+    status = "sent"
+    sent_at = factory.LazyFunction(datetime.utcnow)
+
+
+@pytest.fixture
+def sms_log_factory(db, test_shop):
+    """SMSLogFactory bound to the test session and shop (commit is up to the test)"""
+    class ShopSMSLogFactory(SMSLogFactory):
+        class Meta:
+            sqlalchemy_session = db
+        
+        shop_id = test_shop.id
+    
+    return ShopSMSLogFactory
+
+
+@pytest.fixture
+def sms_dataset(db, sms_log_factory):
+    """SMS logs covering every /api/sms-logs filter case"""
+    sms_log_factory(recipient_phone="+1111111111")
+    sms_log_factory(recipient_phone="+2222222222")
+    sms_log_factory(recipient_phone="+3333333333", message_type="car_ready",
+                    message_body="Your car is ready!", status="delivered")
+    sms_log_factory(
+        recipient_phone="+4444444444",
+        message_type="service_reminder",
+        message_body="Time for service!",
+        status="failed",
+        error_message="Invalid phone number"
+    )
+    db.commit()
+
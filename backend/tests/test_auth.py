@@ -3,6 +3,7 @@ Tests for authentication endpoints
 """
 import pytest
 from fastapi import status
+from app.main import app
 
 
 class TestStaffLogin:
@@ -170,33 +171,11 @@ class TestCustomerLogin:
 class TestAuthEndpointsNoRedirect:
     """Test that auth endpoints don't cause 307 redirects"""
     
-    def test_staff_login_endpoint_no_trailing_slash_redirect(self, client, test_staff):
-        """Test that staff login endpoint doesn't cause 307 redirect"""
-        # The endpoint is defined without trailing slash, so this should work directly
-        response = client.post(
-            "/api/auth/staff/login",
-            json={
-                "username": "teststaff",
-                "password": "testpass123"
-            }
-        )
-        
-        # Should get 200, not 307 redirect
-        assert response.status_code == status.HTTP_200_OK
-        # Ensure no redirect history
-        assert len(response.history) == 0
-    
-    def test_customer_login_endpoint_no_trailing_slash_redirect(self, client, test_customer):
-        """Test that customer login endpoint doesn't cause 307 redirect"""
-        response = client.post(
-            "/api/auth/customer/login",
-            json={
-                "username": "+1234567892",
-                "password": "testpass123"
-            }
-        )
+    @pytest.mark.parametrize("path", ["/api/auth/staff/login", "/api/auth/customer/login"])
+    def test_login_endpoint_registered_without_trailing_slash(self, path):
+        """Test that login routes match their exact slash-less path for POST"""
+        routes = [route for route in app.routes if getattr(route, "path", None) == path]
         
-        # Should get 200, not 307 redirect
-        assert response.status_code == status.HTTP_200_OK
-        # Ensure no redirect history
-        assert len(response.history) == 0
+        assert routes
+        assert all("POST" in route.methods for route in routes)
+        assert app.router.redirect_slashes is False
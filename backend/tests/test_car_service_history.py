@@ -9,7 +9,7 @@ from app.models import Car, WorkOrder, CarOwnershipHistory, WorkOrderStatus, Cus
 class TestCarServiceHistory:
     """Test GET /api/cars/{car_id}/service-history endpoint"""
     
-    def test_get_service_history_returns_work_orders_and_ownership(self, client, db, test_staff, test_shop, test_customer):
+    def test_get_service_history_returns_work_orders_and_ownership(self, client, staff_auth_headers, db, test_staff, test_shop, test_customer):
         """Test that service history includes work orders and ownership history"""
         # Create a car
         car = Car(
@@ -21,8 +21,7 @@ class TestCarServiceHistory:
             current_mileage=75000
         )
         db.add(car)
-        db.commit()
-        db.refresh(car)
+        db.flush()
         
         # Create work orders
         wo1 = WorkOrder(
@@ -41,8 +40,6 @@ class TestCarServiceHistory:
             status=WorkOrderStatus.DONE,
             mileage_at_intake=73000
         )
-        db.add_all([wo1, wo2])
-        db.commit()
         
         # Create another customer for ownership transfer
         customer2 = Customer(
@@ -54,9 +51,6 @@ class TestCarServiceHistory:
             last_name="Customer",
             is_active=True
         )
-        db.add(customer2)
-        db.commit()
-        db.refresh(customer2)
         
         # Create ownership history
         ownership = CarOwnershipHistory(
@@ -66,20 +60,15 @@ class TestCarServiceHistory:
             transferred_by_staff_id=test_staff.id,
             notes="Initial registration"
         )
-        db.add(ownership)
-        db.commit()
         
-        # Login as staff
-        login_response = client.post(
-            "/api/auth/staff/login",
-            json={"username": "teststaff", "password": "testpass123"}
-        )
-        token = login_response.json()["access_token"]
+        # Insert the work orders, second customer and ownership record together
+        db.add_all([wo1, wo2, customer2, ownership])
+        db.commit()
         
         # Get service history
         response = client.get(
             f"/api/cars/{car.id}/service-history",
-            headers={"Authorization": f"Bearer {token}"}
+            headers=staff_auth_headers
         )
         
         assert response.status_code == status.HTTP_200_OK
@@ -104,24 +93,17 @@ class TestCarServiceHistory:
         assert len(data["ownership_history"]) == 1
         assert data["ownership_history"][0]["notes"] == "Initial registration"
     
-    def test_get_service_history_for_nonexistent_car_returns_404(self, client, test_staff):
+    def test_get_service_history_for_nonexistent_car_returns_404(self, client, staff_auth_headers):
         """Test that requesting service history for non-existent car returns 404"""
-        # Login as staff
-        login_response = client.post(
-            "/api/auth/staff/login",
-            json={"username": "teststaff", "password": "testpass123"}
-        )
-        token = login_response.json()["access_token"]
-        
         # Try to get service history for non-existent car
         response = client.get(
             "/api/cars/99999/service-history",
-            headers={"Authorization": f"Bearer {token}"}
+            headers=staff_auth_headers
         )
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
     
-    def test_get_service_history_empty_for_new_car(self, client, db, test_staff, test_shop, test_customer):
+    def test_get_service_history_empty_for_new_car(self, client, staff_auth_headers, db, test_shop, test_customer):
         """Test that service history is empty for a car with no work orders"""
         # Create a new car with no work orders
         car = Car(
@@ -134,19 +116,11 @@ class TestCarServiceHistory:
         )
         db.add(car)
         db.commit()
-        db.refresh(car)
-        
-        # Login as staff
-        login_response = client.post(
-            "/api/auth/staff/login",
-            json={"username": "teststaff", "password": "testpass123"}
-        )
-        token = login_response.json()["access_token"]
         
         # Get service history
         response = client.get(
             f"/api/cars/{car.id}/service-history",
-            headers={"Authorization": f"Bearer {token}"}
+            headers=staff_auth_headers
         )
         
         assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,37 @@
+"""
+Tests for helper utilities
+"""
+import phonenumbers
+import pytest
+from app.utils.helpers import validate_phone_number
+
+
+def _phonenumbers_e164(phone):
+    """Result of the phonenumbers path, bypassing the BG fast path"""
+    parsed = phonenumbers.parse(phone, "BG")
+    if not phonenumbers.is_valid_number(parsed):
+        return None
+    return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+
+
+class TestValidatePhoneNumber:
+    """Test validate_phone_number"""
+    
+    @pytest.mark.parametrize("phone", [
+        "+359888123456",
+        "+359888123456\n",
+        " +359888123456 ",
+        "+359888123456  \n",
+        "0888123456",
+        "+359 888 123 456",
+    ])
+    def test_fast_path_matches_phonenumbers(self, phone):
+        """Test that padded input is normalised the same way with or without the fast path"""
+        result = validate_phone_number(phone)
+        
+        assert result == _phonenumbers_e164(phone)
+        assert result == "+359888123456"
+    
+    def test_invalid_number_returns_none(self):
+        """Test that an invalid number is rejected"""
+        assert validate_phone_number("+35912") is None
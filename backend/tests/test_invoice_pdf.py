@@ -0,0 +1,257 @@
+"""
+Tests for invoice PDF generation and caching
+"""
+import copy
+import os
+import re
+import time
+import pytest
+from datetime import datetime
+from pathlib import Path
+from fastapi import status
+from app.models import Invoice, InvoiceStatus, WorkOrderLineItem
+from app.routers import invoices as invoices_router
+from app.services import pdf as pdf_module
+from app.services.pdf import PDFService
+
+
+@pytest.fixture
+def invoice_pdf_data():
+    """(invoice, work order, shop, customer, line items) dicts for a short draft invoice"""
+    return (
+        {
+            "invoice_number": "INV-2024-00001",
+            "created_at": datetime(2024, 3, 1, 10, 30),
+            "subtotal": 150.0,
+            "tax_rate": 0.2,
+            "tax_amount": 30.0,
+            "total": 180.0,
+            "notes": None,
+            "status": "draft",
+            "paid_at": None,
+            "payment_method": None
+        },
+        {"reported_issues": "Engine noise", "mileage_at_intake": 50000},
+        {
+            "name": "Test Auto Shop",
+            "address": "Test Address",
+            "phone": "+1234567890",
+            "email": "test@shop.com",
+            "website": None
+        },
+        {"first_name": "Test", "last_name": "Customer", "phone": "+1234567892", "email": None},
+        [
+            {"description": "Oil filter", "quantity": 1.0, "unit_price": 50.0, "total_price": 50.0},
+            {"description": "Labor", "quantity": 2.0, "unit_price": 50.0, "total_price": 100.0},
+        ]
+    )
+
+
+@pytest.fixture
+def pdf_service(tmp_path, monkeypatch):
+    """PDFService writing to a temp dir, also used by the invoice PDF endpoint"""
+    service = PDFService(str(tmp_path))
+    monkeypatch.setattr(invoices_router, "get_pdf_service", lambda: service)
+    return service
+
+
+@pytest.fixture
+def test_invoice(db, test_shop, test_customer, car_and_wo):
+    """Draft invoice with one labor line item on the car_and_wo work order"""
+    car, work_order = car_and_wo
+    invoice = Invoice(
+        shop_id=test_shop.id,
+        work_order_id=work_order.id,
+        customer_id=test_customer.id,
+        invoice_number="INV-2024-00001",
+        status=InvoiceStatus.DRAFT,
+        subtotal=100.0,
+        total=100.0
+    )
+    line_item = WorkOrderLineItem(
+        work_order_id=work_order.id,
+        item_type="labor",
+        description="Diagnostics",
+        quantity=1.0,
+        unit_price=100.0,
+        total_price=100.0
+    )
+    db.add_all([invoice, line_item])
+    db.flush()
+    return invoice
+
+
+class TestInvoicePDFCache:
+    """Test content-hash caching in PDFService.generate_invoice_pdf"""
+    
+    def test_identical_invoice_is_served_from_cache(self, pdf_service, invoice_pdf_data, monkeypatch):
+        """Test that regenerating unchanged data returns the same file without rendering"""
+        path = pdf_service.generate_invoice_pdf(*invoice_pdf_data)
+        assert Path(path).read_bytes().startswith(b"%PDF")
+        
+        def fail_render(*args):
+            raise AssertionError("cached invoice was rendered again")
+        
+        monkeypatch.setattr(pdf_service, "generate_to_buffer", fail_render)
+        assert pdf_service.generate_invoice_pdf(*invoice_pdf_data) == path
+    
+    def test_changed_content_gets_a_new_filename(self, pdf_service, invoice_pdf_data):
+        """Test that editing the invoice changes the cached filename"""
+        path = pdf_service.generate_invoice_pdf(*invoice_pdf_data)
+        invoice_pdf_data[0]["notes"] = "Customer supplied parts"
+        
+        new_path = pdf_service.generate_invoice_pdf(*invoice_pdf_data)
+        
+        assert new_path != path
+        assert os.path.basename(new_path).startswith("invoice_INV-2024-00001_")
+        assert os.path.exists(new_path)
+    
+    def test_template_version_is_part_of_the_key(self, pdf_service, invoice_pdf_data, monkeypatch):
+        """Test that a template change invalidates previously cached PDFs"""
+        path = pdf_service.generate_invoice_pdf(*invoice_pdf_data)
+        monkeypatch.setattr(pdf_module, "TEMPLATE_VERSION", pdf_module.TEMPLATE_VERSION + 1)
+        
+        assert pdf_service.generate_invoice_pdf(*invoice_pdf_data) != path
+
+
+def _page_count(pdf_bytes):
+    return len(re.findall(rb"/Type /Page\b(?!s)", pdf_bytes))
+
+
+class TestInvoicePDFRendering:
+    """Test the canvas fast path, the Platypus fallback and their shared content"""
+    
+    def test_short_invoice_uses_fast_layout(self, pdf_service, invoice_pdf_data, monkeypatch):
+        """Test that a short invoice renders on the canvas fast path"""
+        def fail_platypus(*args):
+            raise AssertionError("short invoice fell back to Platypus")
+        
+        monkeypatch.setattr(pdf_service, "_platypus_invoice", fail_platypus)
+        pdf_bytes = pdf_service.generate_to_buffer(*invoice_pdf_data)
+        
+        assert pdf_bytes.startswith(b"%PDF")
+        assert _page_count(pdf_bytes) == 1
+    
+    def test_long_description_falls_back_to_platypus(self, pdf_service, invoice_pdf_data, monkeypatch):
+        """Test that a description too wide for its column is wrapped by Platypus"""
+        line_items = invoice_pdf_data[4]
+        line_items[0]["description"] = "Front and rear brake pads, discs and sensors " * 4
+        
+        def fail_fast(*args):
+            raise AssertionError("long description used the fast layout")
+        
+        monkeypatch.setattr(pdf_service, "_fast_invoice", fail_fast)
+        pdf_bytes = pdf_service.generate_to_buffer(*invoice_pdf_data)
+        
+        assert pdf_bytes.startswith(b"%PDF")
+    
+    def test_many_items_span_several_pages(self, pdf_service, invoice_pdf_data):
+        """Test that the fast path breaks the items table across pages"""
+        invoice_pdf_data[4][:] = [
+            {"description": f"Part {n}", "quantity": 1.0, "unit_price": 10.0, "total_price": 10.0}
+            for n in range(80)
+        ]
+        assert pdf_service._fits_fast_layout(invoice_pdf_data[2], invoice_pdf_data[4])
+        
+        pdf_bytes = pdf_service.generate_to_buffer(*invoice_pdf_data)
+        
+        assert _page_count(pdf_bytes) >= 3
+    
+    def test_both_layouts_get_the_same_plain_text(self, pdf_service, invoice_pdf_data):
+        """Test that notes are never markup and a missing website is left blank"""
+        invoice_data, _, shop_data, _, _ = invoice_pdf_data
+        invoice_data["notes"] = "Use <b>5W-30</b> & keep the old filter\nCall before 5pm"
+        
+        blocks = pdf_service._text_blocks(invoice_data, shop_data)
+        
+        assert blocks[0] == [
+            (True, "Бележки / Notes:"),
+            (False, "Use <b>5W-30</b> & keep the old filter"),
+            (False, "Call before 5pm"),
+        ]
+        assert blocks[-1][-1] == (False, "")
+    
+    def test_markup_like_notes_render_on_both_layouts(self, pdf_service, invoice_pdf_data):
+        """Test that unbalanced markup in notes does not break the Platypus layout"""
+        invoice_pdf_data[0]["notes"] = "Torque <unclosed & check"
+        invoice_pdf_data[0]["status"] = "paid"
+        assert pdf_service.generate_to_buffer(*invoice_pdf_data).startswith(b"%PDF")
+        
+        invoice_pdf_data[4][0]["description"] = "Front and rear brake pads, discs and sensors " * 4
+        assert pdf_service.generate_to_buffer(*invoice_pdf_data).startswith(b"%PDF")
+
+
+class TestGenerateInvoicesBulk:
+    """Test PDFService.generate_invoices_bulk"""
+    
+    def test_bulk_output_matches_single_generation(self, pdf_service, invoice_pdf_data, tmp_path):
+        """Test that spawned workers write the same invoices generate_invoice_pdf would"""
+        second = copy.deepcopy(invoice_pdf_data)
+        second[0]["invoice_number"] = "INV-2024-00002"
+        second[0]["notes"] = "Second invoice"
+        jobs = [invoice_pdf_data, second]
+        
+        paths = pdf_service.generate_invoices_bulk(jobs, max_workers=2)
+        
+        single_service = PDFService(str(tmp_path / "single"))
+        expected = [single_service.generate_invoice_pdf(*job) for job in jobs]
+        assert [os.path.basename(p) for p in paths] == [os.path.basename(p) for p in expected]
+        for path, expected_path in zip(paths, expected):
+            assert os.path.dirname(path) == pdf_service.output_dir
+            pdf_bytes = Path(path).read_bytes()
+            assert pdf_bytes.startswith(b"%PDF")
+            assert _page_count(pdf_bytes) == _page_count(Path(expected_path).read_bytes())
+
+
+class TestInvoicePDFEndpoint:
+    """Test GET /api/invoices/{invoice_id}/pdf"""
+    
+    def test_regenerated_pdf_leaves_the_previous_file_in_place(self, client, db, staff_auth_headers, pdf_service, test_invoice):
+        """Test that changing the invoice repoints pdf_url without deleting the file in use"""
+        response = client.get(f"/api/invoices/{test_invoice.id}/pdf", headers=staff_auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/pdf"
+        first_pdf = test_invoice.pdf_url
+        assert os.path.exists(first_pdf)
+        
+        test_invoice.notes = "Customer supplied parts"
+        db.flush()
+        response = client.get(f"/api/invoices/{test_invoice.id}/pdf", headers=staff_auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert test_invoice.pdf_url != first_pdf
+        assert os.path.exists(test_invoice.pdf_url)
+        # A concurrent download may still be streaming it; the sweep removes it later
+        assert os.path.exists(first_pdf)
+
+
+class TestSweepSupersededPDFs:
+    """Test PDFService.sweep_superseded_pdfs"""
+    
+    def test_only_old_unreferenced_files_are_removed(self, pdf_service, invoice_pdf_data):
+        """Test that referenced and recently used PDFs survive the sweep"""
+        stale = pdf_service.generate_invoice_pdf(*invoice_pdf_data)
+        invoice_pdf_data[0]["notes"] = "Recent"
+        recent = pdf_service.generate_invoice_pdf(*invoice_pdf_data)
+        invoice_pdf_data[0]["notes"] = "Current"
+        current = pdf_service.generate_invoice_pdf(*invoice_pdf_data)
+        hour_ago = time.time() - pdf_service.SWEEP_MIN_AGE - 1
+        os.utime(stale, (hour_ago, hour_ago))
+        os.utime(current, (hour_ago, hour_ago))
+        
+        assert pdf_service.sweep_superseded_pdfs([current, None]) == 1
+        
+        assert not os.path.exists(stale)
+        assert os.path.exists(recent)
+        assert os.path.exists(current)
+    
+    def test_cache_hit_marks_the_file_as_recently_used(self, pdf_service, invoice_pdf_data):
+        """Test that re-serving a cached PDF protects it from the sweep"""
+        path = pdf_service.generate_invoice_pdf(*invoice_pdf_data)
+        hour_ago = time.time() - pdf_service.SWEEP_MIN_AGE - 1
+        os.utime(path, (hour_ago, hour_ago))
+        
+        assert pdf_service.generate_invoice_pdf(*invoice_pdf_data) == path
+        
+        assert pdf_service.sweep_superseded_pdfs([]) == 0
+        assert os.path.exists(path)
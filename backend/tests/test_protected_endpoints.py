@@ -1,137 +1,119 @@
 """
 Tests for protected endpoints and authorization
 """
+import orjson
 import pytest
+from datetime import timedelta
 from fastapi import status
+from jose import jws
+from app.config import settings
+from app.main import app
 from app.utils.auth import create_access_token
 
 
 class TestProtectedEndpoints:
     """Test authorization on protected endpoints"""
     
-    def test_protected_endpoint_without_token_returns_401(self, client, test_shop):
-        """Test that accessing protected endpoint without token returns 401 or 403"""
-        # Try to access dashboard without authentication
-        response = client.get("/api/reports/dashboard")
-        
-        # May return 401 or 403 depending on implementation
+    @pytest.mark.parametrize("endpoint", [
+        "/api/reports/dashboard",
+        "/api/work-orders",
+        "/api/appointments/pending",
+        "/api/customers/me",
+        "/api/sms-logs",
+    ])
+    def test_protected_endpoint_without_token_returns_401(self, client_no_db, endpoint):
+        """Test that accessing protected endpoints without token returns 401 or 403"""
+        response = client_no_db.get(endpoint)
+        
+        # HTTPBearer rejects a missing Authorization header with 403
         assert response.status_code in [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN]
     
-    def test_protected_endpoint_with_invalid_token_returns_401(self, client, test_shop):
+    def test_protected_endpoint_with_invalid_token_returns_401(self, client_no_db):
         """Test that accessing protected endpoint with invalid token returns 401"""
-        response = client.get(
+        response = client_no_db.get(
             "/api/reports/dashboard",
             headers={"Authorization": "Bearer invalid_token_here"}
         )
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
     
-    def test_protected_endpoint_with_valid_token_no_redirect(self, client, test_staff):
-        """Test that protected endpoint with valid token doesn't cause redirect"""
-        # Create a valid access token
+    def test_protected_endpoint_with_expired_token_returns_401(self, client, test_staff):
+        """Test that a correctly signed but expired token is rejected"""
         access_token = create_access_token(
             data={
                 "sub": test_staff.id,
                 "role": test_staff.role.value,
                 "shop_id": test_staff.shop_id
-            }
+            },
+            expires_delta=timedelta(seconds=-1)
         )
         
-        # Access protected endpoint
         response = client.get(
             "/api/reports/dashboard",
             headers={"Authorization": f"Bearer {access_token}"}
         )
         
-        # Should not be 307 redirect
-        assert response.status_code != status.HTTP_307_TEMPORARY_REDIRECT
-        # Should either succeed (200) or fail with proper error, but not redirect
-        assert len(response.history) == 0
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
     
-    def test_work_orders_endpoint_without_token_returns_401(self, client, test_shop):
-        """Test that work orders endpoint requires authentication"""
-        response = client.get("/api/work-orders")
+    @pytest.mark.parametrize("claims", [
+        pytest.param({"sub": "1", "role": "receptionist", "shop_id": 1}, id="no-exp"),
+        pytest.param({"sub": {"id": 1}, "role": "receptionist", "shop_id": 1, "exp": 4102444800}, id="dict-sub"),
+        pytest.param({"sub": 1, "role": "receptionist", "shop_id": 1, "exp": 4102444800}, id="int-sub"),
+        pytest.param({"role": "receptionist", "shop_id": 1, "exp": 4102444800}, id="no-sub"),
+    ])
+    def test_protected_endpoint_with_malformed_claims_returns_401(self, client_no_db, claims):
+        """Test that a correctly signed token with invalid claims is rejected, not a 500"""
+        access_token = jws.sign(orjson.dumps(claims), settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        
+        response = client_no_db.get(
+            "/api/reports/dashboard",
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
         
-        # May return 401, 403, or 404 depending on implementation
-        assert response.status_code in [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN, status.HTTP_404_NOT_FOUND]
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
     
-    def test_work_orders_endpoint_no_trailing_slash_redirect(self, client, test_staff):
-        """Test that work orders endpoint doesn't cause 307 redirect due to trailing slash"""
-        access_token = create_access_token(
-            data={
-                "sub": test_staff.id,
-                "role": test_staff.role.value,
-                "shop_id": test_staff.shop_id
-            }
+    def test_protected_endpoint_with_valid_token_no_redirect(self, client, staff_auth_headers):
+        """Test that protected endpoint with valid token doesn't cause redirect"""
+        # Access protected endpoint
+        response = client.get(
+            "/api/reports/dashboard",
+            headers=staff_auth_headers
         )
         
+        # Served directly: no redirect of any kind, and the token was accepted
+        assert not response.is_redirect
+        assert response.status_code == status.HTTP_200_OK
+    
+    def test_work_orders_endpoint_no_trailing_slash_redirect(self, client, staff_auth_headers):
+        """Test that work orders endpoint doesn't cause 307 redirect due to trailing slash"""
         # Access endpoint without trailing slash (as defined in routes)
         response = client.get(
             "/api/work-orders",
-            headers={"Authorization": f"Bearer {access_token}"}
+            headers=staff_auth_headers
         )
         
-        # Should not be 307 redirect
-        assert response.status_code != status.HTTP_307_TEMPORARY_REDIRECT
-        assert len(response.history) == 0
-    
-    def test_appointments_pending_endpoint_without_token_returns_401(self, client):
-        """Test that appointments/pending endpoint requires authentication"""
-        response = client.get("/api/appointments/pending")
-        
-        # May return 401 or 403 depending on implementation
-        assert response.status_code in [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN]
-    
-    def test_customers_me_endpoint_without_token_returns_401(self, client):
-        """Test that customers/me endpoint requires authentication"""
-        response = client.get("/api/customers/me")
-        
-        # May return 401 or 403 depending on implementation
-        assert response.status_code in [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN]
+        assert not response.is_redirect
+        assert response.status_code == status.HTTP_200_OK
 
 
 class TestAuthorizationHeaderPreservation:
     """Test that Authorization headers are preserved and not stripped by redirects"""
     
-    def test_authorization_header_preserved_on_protected_endpoint(self, client, test_staff):
+    def test_authorization_header_preserved_on_protected_endpoint(self, client, staff_auth_headers):
         """Test that Authorization header is preserved when accessing protected endpoints"""
-        access_token = create_access_token(
-            data={
-                "sub": test_staff.id,
-                "role": test_staff.role.value,
-                "shop_id": test_staff.shop_id
-            }
-        )
-        
         # Make request to protected endpoint
         response = client.get(
             "/api/staff/mechanics",
-            headers={"Authorization": f"Bearer {access_token}"}
+            headers=staff_auth_headers
         )
         
-        # Should not redirect (which would strip the header)
-        assert response.status_code != status.HTTP_307_TEMPORARY_REDIRECT
-        # Should either succeed or fail with proper status, not auth failure due to stripped header
-        if response.status_code == status.HTTP_401_UNAUTHORIZED:
-            # If 401, it should be because of invalid token, not missing header
-            # In a real scenario with proper dependencies, this should succeed
-            pass
-        
-        # Most importantly, ensure there's no redirect
-        assert len(response.history) == 0
+        # A redirect would strip the header; a 200 shows it reached the endpoint
+        assert not response.is_redirect
+        assert response.status_code == status.HTTP_200_OK
     
-    def test_multiple_protected_endpoints_no_redirect(self, client, test_staff):
+    @pytest.mark.asyncio
+    async def test_multiple_protected_endpoints_no_redirect(self, async_client, staff_auth_headers):
         """Test that multiple protected endpoints don't cause redirects"""
-        access_token = create_access_token(
-            data={
-                "sub": test_staff.id,
-                "role": test_staff.role.value,
-                "shop_id": test_staff.shop_id
-            }
-        )
-        
-        headers = {"Authorization": f"Bearer {access_token}"}
-        
         # Test multiple endpoints
         endpoints = [
             "/api/reports/dashboard",
@@ -140,47 +122,24 @@ class TestAuthorizationHeaderPreservation:
             "/api/work-orders"
         ]
         
+        # Requests run one at a time: they all share the test's DB session
         for endpoint in endpoints:
-            response = client.get(endpoint, headers=headers)
-            # None should cause 307 redirect
-            assert response.status_code != status.HTTP_307_TEMPORARY_REDIRECT
-            assert len(response.history) == 0
+            response = await async_client.get(endpoint, headers=staff_auth_headers)
+            assert not response.is_redirect, endpoint
+            assert response.status_code == status.HTTP_200_OK, endpoint
 
 
 class TestFastAPIRedirectSlashesConfiguration:
     """Test that FastAPI redirect_slashes=False is working"""
     
-    def test_endpoint_with_trailing_slash_returns_404_not_307(self, client, test_staff):
-        """Test that requesting endpoint with trailing slash returns 404, not 307 redirect"""
-        access_token = create_access_token(
-            data={
-                "sub": test_staff.id,
-                "role": test_staff.role.value,
-                "shop_id": test_staff.shop_id
-            }
-        )
-        
-        # Request endpoint WITH trailing slash when route is defined WITHOUT it
-        response = client.get(
-            "/api/work-orders/",  # Note the trailing slash
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        
-        # With redirect_slashes=False, should get 404, not 307
-        # (because the exact route doesn't exist)
-        assert response.status_code in [status.HTTP_404_NOT_FOUND, status.HTTP_401_UNAUTHORIZED]
-        assert response.status_code != status.HTTP_307_TEMPORARY_REDIRECT
+    def test_redirect_slashes_disabled(self):
+        """Test that the router never answers a trailing-slash mismatch with 307"""
+        assert app.router.redirect_slashes is False
     
-    def test_auth_endpoint_with_trailing_slash_returns_404_not_307(self, client, test_staff):
-        """Test that auth endpoint with trailing slash doesn't cause redirect"""
-        # Request with trailing slash
-        response = client.post(
-            "/api/auth/staff/login/",  # Note the trailing slash
-            json={
-                "username": "teststaff",
-                "password": "testpass123"
-            }
-        )
+    def test_routes_are_registered_without_trailing_slash(self):
+        """Test that list and auth routes exist only in their slash-less form"""
+        paths = {route.path for route in app.routes}
         
-        # Should get 404 or some error, but NOT 307 redirect
-        assert response.status_code != status.HTTP_307_TEMPORARY_REDIRECT
+        for path in ["/api/work-orders", "/api/auth/staff/login", "/api/auth/customer/login"]:
+            assert path in paths
+            assert f"{path}/" not in paths
@@ -0,0 +1,200 @@
+"""
+Tests for bulk SMS sending and the nightly service reminder job
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import event
+from twilio.base.exceptions import TwilioRestException
+from app.config import settings
+from app.models import Car, Customer, SMSLog, ServiceReminder, WorkOrder, WorkOrderStatus
+from app.services import sms as sms_module
+from app.services.mileage import MileageService
+from app.services.scheduler import _send_shop_reminders
+from app.services.sms import SMSService
+from app.utils.auth import get_password_hash
+
+# The reminder customers never log in; hash their password once per module
+_REMINDER_CUSTOMER_HASH = get_password_hash("testpass123")
+
+
+class TwilioStub:
+    """Stands in for the Twilio client; phones in `failures` raise their exception"""
+    
+    def __init__(self):
+        self.messages = self
+        self.failures = {}
+        self.sent_to = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def create_async(self, body, from_, to):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0)
+            if to in self.failures:
+                raise self.failures[to]
+            self.sent_to.append(to)
+            return SimpleNamespace(sid=f"SM{len(self.sent_to):032d}")
+        finally:
+            self.in_flight -= 1
+    
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def twilio_stub(monkeypatch):
+    """Configure SMS and route SMSService's Twilio clients to a TwilioStub"""
+    stub = TwilioStub()
+    monkeypatch.setattr(settings, "SMS_ENABLED", True)
+    monkeypatch.setattr(settings, "TWILIO_ACCOUNT_SID", "ACtest")
+    monkeypatch.setattr(settings, "TWILIO_AUTH_TOKEN", "test-token")
+    monkeypatch.setattr(sms_module, "Client", lambda *args, **kwargs: stub)
+    monkeypatch.setattr(sms_module, "AsyncTwilioHttpClient", lambda: stub)
+    return stub
+
+
+@pytest.fixture
+def cars_due_for_service(db, test_shop):
+    """
+    Three customers, each with a car predicted to pass its service interval
+    Two done visits ten days and 900 km apart put each car ~1000 km past its last service
+    """
+    first_visit = datetime.utcnow() - timedelta(days=20)
+    cars = []
+    for n in range(3):
+        customer = Customer(
+            shop_id=test_shop.id,
+            phone=f"+35988800000{n}",
+            first_name="Reminder",
+            last_name=f"Customer{n}",
+            password_hash=_REMINDER_CUSTOMER_HASH,
+            is_active=True
+        )
+        car = Car(
+            shop_id=test_shop.id,
+            owner=customer,
+            make="Skoda",
+            model="Octavia",
+            license_plate=f"CB000{n}AB",
+            current_mileage=9900,
+            service_interval_km=10000
+        )
+        db.add_all([customer, car] + [
+            WorkOrder(
+                shop_id=test_shop.id,
+                customer=customer,
+                car=car,
+                reported_issues="Service",
+                status=WorkOrderStatus.DONE,
+                mileage_at_intake=mileage,
+                created_at=created_at
+            )
+            for mileage, created_at in [(9000, first_visit), (9900, first_visit + timedelta(days=10))]
+        ])
+        cars.append(car)
+    db.flush()
+    return cars
+
+
+class TestSendBulkSMS:
+    """Test SMSService.send_bulk_sms"""
+    
+    def test_transport_error_is_logged_as_failed_and_batch_continues(self, db, test_shop, twilio_stub):
+        """Test that a connection error fails only its own message"""
+        twilio_stub.failures["+2222222222"] = ConnectionResetError()
+        messages = [("+1111111111", "one"), ("+2222222222", "two"), ("+3333333333", "three")]
+        
+        sms_service = SMSService(db)
+        sent = sms_service.send_bulk_sms(test_shop.id, messages, "service_reminder")
+        sms_service.flush_logs()
+        
+        assert sent == [True, False, True]
+        logs = {log.recipient_phone: log for log in db.query(SMSLog).filter(SMSLog.shop_id == test_shop.id)}
+        assert len(logs) == 3
+        assert logs["+1111111111"].status == "sent"
+        assert logs["+1111111111"].twilio_sid is not None
+        assert logs["+2222222222"].status == "failed"
+        assert logs["+2222222222"].error_message == "ConnectionResetError"
+        assert logs["+3333333333"].status == "sent"
+        db.refresh(test_shop)
+        assert test_shop.sms_usage_count == 3
+    
+    def test_twilio_error_is_logged_with_its_message(self, db, test_shop, twilio_stub):
+        """Test that a Twilio API error is logged as failed with its text"""
+        twilio_stub.failures["+1111111111"] = TwilioRestException(400, "/Messages", "Invalid 'To' number")
+        
+        sms_service = SMSService(db)
+        sent = sms_service.send_bulk_sms(test_shop.id, [("+1111111111", "one")])
+        sms_service.flush_logs()
+        
+        assert sent == [False]
+        log = db.query(SMSLog).filter(SMSLog.recipient_phone == "+1111111111").one()
+        assert log.status == "failed"
+        assert "Invalid 'To' number" in log.error_message
+    
+    def test_concurrency_is_capped(self, db, test_shop, twilio_stub):
+        """Test that no more than BULK_SMS_CONCURRENCY requests are in flight"""
+        messages = [(f"+1{n:010d}", "hi") for n in range(SMSService.BULK_SMS_CONCURRENCY * 3)]
+        
+        sent = SMSService(db).send_bulk_sms(test_shop.id, messages)
+        
+        assert all(sent)
+        assert len(twilio_stub.sent_to) == len(messages)
+        assert twilio_stub.max_in_flight == SMSService.BULK_SMS_CONCURRENCY
+
+
+class TestCheckAllCarsForReminders:
+    """Test MileageService.check_all_cars_for_reminders"""
+    
+    def test_cars_and_owners_are_loaded_once(self, db, test_shop, cars_due_for_service):
+        """Test that creating reminders does not reload each car and owner"""
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(db.bind, "before_cursor_execute", record)
+        try:
+            items = MileageService(db).check_all_cars_for_reminders(test_shop.id)
+        finally:
+            event.remove(db.bind, "before_cursor_execute", record)
+        
+        assert len(items) == 3
+        assert sum(s.startswith("SELECT cars.") for s in statements) == 1
+        assert sum(s.startswith("SELECT customers.") for s in statements) == 1
+        assert db.query(ServiceReminder).count() == 3
+
+
+class TestSendShopReminders:
+    """Test the per-shop service reminder job"""
+    
+    def test_only_delivered_reminders_are_marked_sent(self, db, test_shop, cars_due_for_service, twilio_stub):
+        """Test that a failed send leaves its reminder pending for the next run"""
+        failing_car = cars_due_for_service[1]
+        twilio_stub.failures[failing_car.owner.phone] = ConnectionResetError()
+        
+        _send_shop_reminders(db, test_shop.id)
+        
+        reminders = {r.car_id: r for r in db.query(ServiceReminder)}
+        assert len(reminders) == 3
+        for car in cars_due_for_service:
+            assert reminders[car.id].reminder_sent is (car is not failing_car)
+        statuses = sorted(log.status for log in db.query(SMSLog).filter(SMSLog.message_type == "service_reminder"))
+        assert statuses == ["failed", "sent", "sent"]
+    
+    def test_reminded_cars_are_skipped_on_the_next_run(self, db, test_shop, cars_due_for_service, twilio_stub):
+        """Test that only the previously failed reminder is retried"""
+        failing_car = cars_due_for_service[1]
+        twilio_stub.failures[failing_car.owner.phone] = ConnectionResetError()
+        _send_shop_reminders(db, test_shop.id)
+        
+        twilio_stub.failures.clear()
+        twilio_stub.sent_to.clear()
+        _send_shop_reminders(db, test_shop.id)
+        
+        assert twilio_stub.sent_to == [failing_car.owner.phone]
+        assert db.query(ServiceReminder).filter(ServiceReminder.reminder_sent == False).count() == 0
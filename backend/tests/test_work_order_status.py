@@ -3,147 +3,62 @@ Tests for work order status transitions and car_id filtering
 """
 import pytest
 from fastapi import status
+from sqlalchemy import insert
 from app.models import WorkOrder, Car, WorkOrderStatus
 
 
 class TestWorkOrderStatusTransitions:
     """Test work order status update functionality"""
     
-    def test_update_status_to_in_progress_sets_started_at(self, client, db, test_staff, test_shop, test_customer):
-        """Test that updating status to in_progress automatically sets started_at"""
-        # Create a car
-        car = Car(
-            shop_id=test_shop.id,
-            owner_id=test_customer.id,
-            make="Toyota",
-            model="Camry",
-            license_plate="TEST123",
-            current_mileage=50000
-        )
-        db.add(car)
-        db.commit()
-        db.refresh(car)
-        
-        # Create a work order
-        work_order = WorkOrder(
-            shop_id=test_shop.id,
-            customer_id=test_customer.id,
-            car_id=car.id,
-            reported_issues="Engine noise",
-            status=WorkOrderStatus.CREATED
-        )
-        db.add(work_order)
-        db.commit()
-        db.refresh(work_order)
-        
-        # Login as staff
-        login_response = client.post(
-            "/api/auth/staff/login",
-            json={"username": "teststaff", "password": "testpass123"}
-        )
-        token = login_response.json()["access_token"]
-        
-        # Update status to in_progress
-        response = client.put(
-            f"/api/work-orders/{work_order.id}",
-            headers={"Authorization": f"Bearer {token}"},
-            json={"status": "in_progress"}
-        )
-        
-        assert response.status_code == status.HTTP_200_OK
-        data = response.json()
-        assert data["status"] == "in_progress"
-        assert data["started_at"] is not None
-    
-    def test_update_status_to_done_sets_completed_at(self, client, db, test_staff, test_shop, test_customer):
-        """Test that updating status to done automatically sets completed_at"""
-        # Create a car
-        car = Car(
-            shop_id=test_shop.id,
-            owner_id=test_customer.id,
-            make="Honda",
-            model="Civic",
-            license_plate="TEST456",
-            current_mileage=60000
-        )
-        db.add(car)
-        db.commit()
-        db.refresh(car)
-        
-        # Create a work order
-        work_order = WorkOrder(
-            shop_id=test_shop.id,
-            customer_id=test_customer.id,
-            car_id=car.id,
-            reported_issues="Oil change needed",
-            status=WorkOrderStatus.IN_PROGRESS,
-            mileage_at_intake=65000
-        )
-        db.add(work_order)
-        db.commit()
-        db.refresh(work_order)
-        
-        # Login as staff
-        login_response = client.post(
-            "/api/auth/staff/login",
-            json={"username": "teststaff", "password": "testpass123"}
-        )
-        token = login_response.json()["access_token"]
-        
-        # Update status to done
+    @pytest.mark.parametrize("car_and_wo,target,timestamp_field,expected_mileage", [
+        pytest.param(
+            {"car": {"make": "Toyota", "model": "Camry", "license_plate": "TEST123", "current_mileage": 50000},
+             "work_order": {"reported_issues": "Engine noise", "status": WorkOrderStatus.CREATED}},
+            "in_progress", "started_at", 50000,
+            id="in_progress-sets-started_at"
+        ),
+        pytest.param(
+            {"car": {"make": "Honda", "model": "Civic", "license_plate": "TEST456", "current_mileage": 60000},
+             "work_order": {"reported_issues": "Oil change needed", "status": WorkOrderStatus.IN_PROGRESS,
+                            "mileage_at_intake": 65000}},
+            "done", "completed_at", 65000,
+            id="done-sets-completed_at"
+        ),
+    ], indirect=["car_and_wo"])
+    def test_status_transition_sets_timestamp(
+        self, client, db, staff_auth_headers, car_and_wo, target, timestamp_field, expected_mileage
+    ):
+        """Test that a status update sets its timestamp, and done carries intake mileage to the car"""
+        car, work_order = car_and_wo
+        
+        # Update status
         response = client.put(
             f"/api/work-orders/{work_order.id}",
-            headers={"Authorization": f"Bearer {token}"},
-            json={"status": "done"}
+            headers=staff_auth_headers,
+            json={"status": target}
         )
         
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
-        assert data["status"] == "done"
-        assert data["completed_at"] is not None
+        assert data["status"] == target
+        assert data[timestamp_field] is not None
         
-        # Verify car mileage was updated
+        # Verify car mileage (only completing a work order updates it)
         db.refresh(car)
-        assert car.current_mileage == 65000
+        assert car.current_mileage == expected_mileage
     
-    def test_update_work_order_notes(self, client, db, test_staff, test_shop, test_customer):
+    @pytest.mark.parametrize("car_and_wo", [{
+        "car": {"make": "Ford", "model": "F-150", "license_plate": "TEST789", "current_mileage": 80000},
+        "work_order": {"reported_issues": "Brake squeaking", "status": WorkOrderStatus.DIAGNOSING},
+    }], indirect=True)
+    def test_update_work_order_notes(self, client, staff_auth_headers, car_and_wo):
         """Test updating diagnostic_notes and mechanic_notes"""
-        # Create a car
-        car = Car(
-            shop_id=test_shop.id,
-            owner_id=test_customer.id,
-            make="Ford",
-            model="F-150",
-            license_plate="TEST789",
-            current_mileage=80000
-        )
-        db.add(car)
-        db.commit()
-        db.refresh(car)
-        
-        # Create a work order
-        work_order = WorkOrder(
-            shop_id=test_shop.id,
-            customer_id=test_customer.id,
-            car_id=car.id,
-            reported_issues="Brake squeaking",
-            status=WorkOrderStatus.DIAGNOSING
-        )
-        db.add(work_order)
-        db.commit()
-        db.refresh(work_order)
-        
-        # Login as staff
-        login_response = client.post(
-            "/api/auth/staff/login",
-            json={"username": "teststaff", "password": "testpass123"}
-        )
-        token = login_response.json()["access_token"]
+        car, work_order = car_and_wo
         
         # Update notes
         response = client.put(
             f"/api/work-orders/{work_order.id}",
-            headers={"Authorization": f"Bearer {token}"},
+            headers=staff_auth_headers,
             json={
                 "diagnostic_notes": "Brake pads worn out",
                 "mechanic_notes": "Replaced front brake pads"
@@ -159,82 +74,49 @@ class TestWorkOrderStatusTransitions:
 class TestWorkOrderCarIdFilter:
     """Test car_id filtering in work order list endpoint"""
     
-    def test_filter_work_orders_by_car_id(self, client, db, test_staff, test_shop, test_customer):
+    def test_filter_work_orders_by_car_id(self, client, db, staff_auth_headers, test_shop, test_customer):
         """Test filtering work orders by car_id"""
         # Create two cars
-        car1 = Car(
-            shop_id=test_shop.id,
-            owner_id=test_customer.id,
-            make="Toyota",
-            model="Corolla",
-            license_plate="CAR001",
-            current_mileage=40000
-        )
-        car2 = Car(
-            shop_id=test_shop.id,
-            owner_id=test_customer.id,
-            make="Honda",
-            model="Accord",
-            license_plate="CAR002",
-            current_mileage=50000
-        )
-        db.add_all([car1, car2])
-        db.commit()
-        db.refresh(car1)
-        db.refresh(car2)
+        car1_id, car2_id = db.scalars(
+            insert(Car).returning(Car.id, sort_by_parameter_order=True),
+            [
+                {"shop_id": test_shop.id, "owner_id": test_customer.id, "make": "Toyota",
+                 "model": "Corolla", "license_plate": "CAR001", "current_mileage": 40000},
+                {"shop_id": test_shop.id, "owner_id": test_customer.id, "make": "Honda",
+                 "model": "Accord", "license_plate": "CAR002", "current_mileage": 50000},
+            ]
+        ).all()
         
         # Create work orders for both cars
-        wo1 = WorkOrder(
-            shop_id=test_shop.id,
-            customer_id=test_customer.id,
-            car_id=car1.id,
-            reported_issues="Issue 1",
-            status=WorkOrderStatus.CREATED
-        )
-        wo2 = WorkOrder(
-            shop_id=test_shop.id,
-            customer_id=test_customer.id,
-            car_id=car1.id,
-            reported_issues="Issue 2",
-            status=WorkOrderStatus.DONE
-        )
-        wo3 = WorkOrder(
-            shop_id=test_shop.id,
-            customer_id=test_customer.id,
-            car_id=car2.id,
-            reported_issues="Issue 3",
-            status=WorkOrderStatus.CREATED
-        )
-        db.add_all([wo1, wo2, wo3])
-        db.commit()
-        
-        # Login as staff
-        login_response = client.post(
-            "/api/auth/staff/login",
-            json={"username": "teststaff", "password": "testpass123"}
-        )
-        token = login_response.json()["access_token"]
+        db.execute(insert(WorkOrder), [
+            {"shop_id": test_shop.id, "customer_id": test_customer.id, "car_id": car1_id,
+             "reported_issues": "Issue 1", "status": WorkOrderStatus.CREATED},
+            {"shop_id": test_shop.id, "customer_id": test_customer.id, "car_id": car1_id,
+             "reported_issues": "Issue 2", "status": WorkOrderStatus.DONE},
+            {"shop_id": test_shop.id, "customer_id": test_customer.id, "car_id": car2_id,
+             "reported_issues": "Issue 3", "status": WorkOrderStatus.CREATED},
+        ])
         
         # Filter by car1
         response = client.get(
             "/api/work-orders",
-            params={"car_id": car1.id},
-            headers={"Authorization": f"Bearer {token}"}
+            params={"car_id": car1_id},
+            headers=staff_auth_headers
         )
         
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert len(data) == 2
-        assert all(wo["car_id"] == car1.id for wo in data)
+        assert all(wo["car_id"] == car1_id for wo in data)
         
         # Filter by car2
         response = client.get(
             "/api/work-orders",
-            params={"car_id": car2.id},
-            headers={"Authorization": f"Bearer {token}"}
+            params={"car_id": car2_id},
+            headers=staff_auth_headers
         )
         
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert len(data) == 1
-        assert data[0]["car_id"] == car2.id
+        assert data[0]["car_id"] == car2_id